@@ -0,0 +1,131 @@
+"""
+Rebuild write-time analytics rollups from existing submissions.
+
+/analytics reads the STATS#TOTAL and STATS#DAY#<date> items maintained by
+contact_form_lambda.record_submission_rollup. Forms that received submissions
+before rollups were deployed (or whose rollups drifted) can be rebuilt here.
+
+Usage:
+    python backfill_rollups.py --table contact-form-submissions-prod --form-id contact-us
+    python backfill_rollups.py --table contact-form-submissions-prod --all
+    python backfill_rollups.py --table ... --form-id careers --dry-run
+
+Run it during a quiet period: submissions written while a form is being
+rebuilt may be counted twice or not at all until the next backfill.
+"""
+
+import argparse
+import time
+from collections import Counter
+
+import boto3
+
+ROLLUP_TTL_DAYS = 90
+
+
+def list_form_ids(table):
+    """Scan the table for every form_id that has at least one submission."""
+    form_ids = set()
+    scan_params = {
+        "ProjectionExpression": "pk, sk",
+        "FilterExpression": "begins_with(sk, :sk_prefix)",
+        "ExpressionAttributeValues": {":sk_prefix": "SUBMIT#"},
+    }
+
+    while True:
+        response = table.scan(**scan_params)
+        for item in response.get("Items", []):
+            form_ids.add(item["pk"][len("FORM#"):])
+
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        if not last_evaluated_key:
+            break
+        scan_params["ExclusiveStartKey"] = last_evaluated_key
+
+    return sorted(form_ids)
+
+
+def compute_rollup(table, form_id):
+    """Count submissions per UTC day and find the latest one."""
+    day_counts = Counter()
+    latest = None
+    query_params = {
+        "KeyConditionExpression": "pk = :pk AND begins_with(sk, :sk_prefix)",
+        "ExpressionAttributeValues": {":pk": f"FORM#{form_id}", ":sk_prefix": "SUBMIT#"},
+        "ProjectionExpression": "sk, id, ts",
+    }
+
+    while True:
+        response = table.query(**query_params)
+        for item in response.get("Items", []):
+            ts = item.get("ts", "")
+            if ts:
+                day_counts[ts[:10]] += 1
+            # Items are returned in sk (time) order, so the last one wins
+            latest = item
+
+        last_evaluated_key = response.get("LastEvaluatedKey")
+        if not last_evaluated_key:
+            break
+        query_params["ExclusiveStartKey"] = last_evaluated_key
+
+    return day_counts, latest
+
+
+def write_rollup(table, form_id, day_counts, latest):
+    """Overwrite the rollup items for a form."""
+    pk = f"FORM#{form_id}"
+    now = int(time.time())
+
+    with table.batch_writer() as batch:
+        for day, count in day_counts.items():
+            batch.put_item(Item={
+                "pk": pk,
+                "sk": f"STATS#DAY#{day}",
+                "count": count,
+                "ttl": now + (ROLLUP_TTL_DAYS * 86400),
+            })
+
+        total_item = {
+            "pk": pk,
+            "sk": "STATS#TOTAL",
+            "total_submissions": sum(day_counts.values()),
+            # /analytics only trusts a STATS#TOTAL carrying this marker
+            "backfilled_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)),
+        }
+        if latest:
+            total_item["latest_id"] = latest.get("id")
+            total_item["last_submission_ts"] = latest.get("ts")
+        batch.put_item(Item=total_item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild FormBridge analytics rollups from submissions")
+    parser.add_argument("--table", required=True, help="Submissions DynamoDB table name")
+    parser.add_argument("--region", default=None, help="AWS region (default: from environment)")
+    parser.add_argument("--endpoint-url", default=None, help="DynamoDB endpoint (e.g. http://localhost:4566 for LocalStack)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--form-id", action="append", help="Form to rebuild (repeatable)")
+    group.add_argument("--all", action="store_true", help="Rebuild every form found in the table")
+    parser.add_argument("--dry-run", action="store_true", help="Print computed rollups without writing")
+    args = parser.parse_args()
+
+    dynamodb = boto3.resource("dynamodb", region_name=args.region, endpoint_url=args.endpoint_url)
+    table = dynamodb.Table(args.table)
+
+    form_ids = list_form_ids(table) if args.all else args.form_id
+    print(f"Rebuilding rollups for {len(form_ids)} form(s) in {args.table}")
+
+    for form_id in form_ids:
+        day_counts, latest = compute_rollup(table, form_id)
+        total = sum(day_counts.values())
+        print(f"  {form_id}: total={total}, days={len(day_counts)}, latest_id={latest.get('id') if latest else None}")
+
+        if not args.dry_run:
+            write_rollup(table, form_id, day_counts, latest)
+
+    print("Dry run complete (nothing written)" if args.dry_run else "Backfill complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmark webhook_dispatcher's DispatchEngine against local mock endpoints.
+
+Starts one threaded HTTP server per mock "host" (each on its own port, so
+each counts as a separate host for WEBHOOK_MAX_PER_HOST), builds an SQS
+batch whose records fan out to those hosts, and runs it through
+process_webhook_records with sequential and concurrent limits.
+
+Usage:
+    python bench_webhook_dispatch.py
+    python bench_webhook_dispatch.py --records 10 --webhooks 3 --hosts 4 --latency-ms 200
+    python bench_webhook_dispatch.py --slow-host-ms 2000 --max-in-flight 32 --max-per-host 8
+    python bench_webhook_dispatch.py --payload-cpu --records 2000 --webhooks 4
+
+--payload-cpu skips the servers and measures the CPU spent building,
+serializing, signing (and optionally gzipping) payloads per delivery,
+per-endpoint serialization vs. the serialize-once pipeline.
+
+Nothing leaves the machine: every webhook URL points at 127.0.0.1.
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import webhook_dispatcher
+from webhook_dispatcher import DispatchEngine, IdempotencyStore, process_webhook_records
+
+
+def make_handler(latency_secs):
+    """Request handler that drains the body, sleeps, and returns 200."""
+    class MockWebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency_secs)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockWebhookHandler
+
+
+def start_mock_hosts(count, latency_ms, slow_host_ms):
+    """Start count servers; the first one uses slow_host_ms if given."""
+    servers = []
+    for i in range(count):
+        latency = slow_host_ms if (i == 0 and slow_host_ms) else latency_ms
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency / 1000))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def build_batch(records, webhooks, ports):
+    """SQS-style records whose webhooks are spread round-robin over the mock hosts."""
+    batch = []
+    n = 0
+    for r in range(records):
+        hooks = []
+        for w in range(webhooks):
+            port = ports[n % len(ports)]
+            n += 1
+            hooks.append({"type": "generic", "url": f"http://127.0.0.1:{port}/hook/{r}/{w}"})
+        batch.append({
+            "messageId": f"bench-{r}",
+            "body": json.dumps({
+                "form_id": "bench",
+                "id": f"sub-{r}",
+                "ts": "2025-01-01T00:00:00Z",
+                "name": "Bench",
+                "email": "bench@example.com",
+                "message": "x" * 200,
+                "webhooks": hooks,
+            }),
+        })
+    return batch
+
+
+def run_case(label, batch, engine):
+    # Every run sends the same submissions; don't let dedup skip them
+    webhook_dispatcher._idempotency = IdempotencyStore("off")
+    started = time.perf_counter()
+    results = process_webhook_records(batch, engine)
+    elapsed = time.perf_counter() - started
+    calls = sum(r.get("webhooks_dispatched", 0) for r in results)
+    ok = sum(1 for r in results if r.get("success"))
+    print(f"  {label:<34} {elapsed * 1000:>9.1f} ms  {calls / elapsed:>8.1f} calls/s  records_ok={ok}/{len(results)}")
+    return results
+
+
+def outcome(results):
+    """Order-sensitive summary used to check the runs agree."""
+    return [
+        (r["record_id"], [(w["index"], w.get("success")) for w in r.get("results", [])])
+        for r in results
+    ]
+
+
+def all_sent(results):
+    """True if every webhook was actually delivered (none skipped)."""
+    return all(
+        w.get("success") and not w.get("skipped")
+        for r in results for w in r.get("results", [])
+    )
+
+
+def payload_cpu_case(label, records, webhooks, deliver):
+    started = time.process_time()
+    wire_bytes = 0
+    for record in records:
+        for webhook in webhooks:
+            wire_bytes += deliver(record, webhook)
+    cpu = time.process_time() - started
+    deliveries = len(records) * len(webhooks)
+    print(f"  {label:<34} {cpu * 1e6 / deliveries:>8.1f} us CPU/delivery  {wire_bytes / deliveries:>8.0f} bytes/delivery")
+
+
+def payload_cpu_bench(args):
+    """CPU per delivery for payload building + signing, before and after the pipeline."""
+    kinds = ["slack", "discord"] + ["generic"] * max(0, args.webhooks - 2)
+    webhooks = [
+        {"type": kind, "url": f"https://example.com/hook/{i}", "hmac_secret": "bench-secret"}
+        for i, kind in enumerate(kinds[:args.webhooks])
+    ]
+    records = [
+        {
+            "form_id": "bench", "id": f"sub-{r}", "ts": "2025-01-01T00:00:00Z", "name": "Bench",
+            "email": "bench@example.com", "message": "x" * args.message_bytes,
+            "page": "/contact", "ip": "127.0.0.1", "ua": "bench",
+        }
+        for r in range(args.records)
+    ]
+    builders = {
+        "slack": webhook_dispatcher.slack_payload,
+        "discord": webhook_dispatcher.discord_payload,
+        "generic": webhook_dispatcher.generic_payload,
+    }
+    
+    def per_endpoint(record, webhook):
+        # Pre-pipeline behaviour: build, serialize and sign for every endpoint
+        body = json.dumps(builders[webhook["type"]](record)).encode("utf-8")
+        if webhook["type"] == "generic":
+            webhook_dispatcher.compute_hmac_signature(webhook["hmac_secret"], body)
+        return len(body)
+    
+    record_payloads = {}
+    
+    def pipeline(record, webhook, compress=False):
+        payloads = record_payloads.get(record["id"])
+        if payloads is None:
+            payloads = record_payloads[record["id"]] = webhook_dispatcher.RecordPayloads(record)
+        body = payloads.get(webhook["type"])
+        if webhook["type"] == "generic":
+            if compress and len(body) >= webhook_dispatcher.WEBHOOK_GZIP_MIN_BYTES:
+                body = webhook_dispatcher.gzip_payload(body)
+            webhook_dispatcher.compute_hmac_signature(webhook["hmac_secret"], body)
+        return len(body)
+    
+    print(
+        f"{args.records} records x {len(webhooks)} webhooks ({', '.join(kinds[:args.webhooks])}), "
+        f"message={args.message_bytes} bytes"
+    )
+    payload_cpu_case("per-endpoint serialize + sign", records, webhooks, per_endpoint)
+    payload_cpu_case("serialize once, sign per endpoint", records, webhooks, pipeline)
+    record_payloads.clear()
+    payload_cpu_case("  ... + gzip (generic)", records, webhooks, lambda r, w: pipeline(r, w, compress=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent webhook dispatch against local mock servers")
+    parser.add_argument("--records", type=int, default=10, help="SQS records in the batch")
+    parser.add_argument("--webhooks", type=int, default=3, help="Webhooks per record")
+    parser.add_argument("--hosts", type=int, default=4, help="Distinct mock hosts")
+    parser.add_argument("--latency-ms", type=float, default=100, help="Mock endpoint latency")
+    parser.add_argument("--slow-host-ms", type=float, default=0, help="Latency of one deliberately slow host (0 = none)")
+    parser.add_argument("--max-in-flight", type=int, default=webhook_dispatcher.WEBHOOK_MAX_IN_FLIGHT)
+    parser.add_argument("--max-per-host", type=int, default=webhook_dispatcher.WEBHOOK_MAX_PER_HOST)
+    parser.add_argument("--payload-cpu", action="store_true", help="Measure payload CPU per delivery instead of dispatch")
+    parser.add_argument("--message-bytes", type=int, default=2000, help="Submission message size for --payload-cpu")
+    args = parser.parse_args()
+    
+    if args.payload_cpu:
+        payload_cpu_bench(args)
+        return
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    servers = start_mock_hosts(args.hosts, args.latency_ms, args.slow_host_ms)
+    batch = build_batch(args.records, args.webhooks, [s.server_address[1] for s in servers])
+
+    print(
+        f"{args.records} records x {args.webhooks} webhooks over {args.hosts} hosts, "
+        f"latency={args.latency_ms:g} ms" + (f", slow host={args.slow_host_ms:g} ms" if args.slow_host_ms else "")
+    )
+
+    sequential = run_case("sequential (1 in flight)", batch, DispatchEngine(1, 1))
+    concurrent = run_case(
+        f"concurrent ({args.max_in_flight} in flight, {args.max_per_host}/host)",
+        batch,
+        DispatchEngine(args.max_in_flight, args.max_per_host),
+    )
+
+    identical = outcome(sequential) == outcome(concurrent) and all_sent(sequential) and all_sent(concurrent)
+    print("  results identical and in order: " + ("yes" if identical else "NO"))
+
+    # Both runs share the dispatcher's keep-alive session pool
+    stats = webhook_dispatcher._sessions.stats().values()
+    connections = sum(s["connections"] for s in stats)
+    requests_sent = sum(s["requests"] for s in stats)
+    print(f"  connections opened: {connections} for {requests_sent} requests")
+
+    for host, summary in webhook_dispatcher._latency.stats().items():
+        print(
+            f"  {host}: p50={summary['p50_ms']} ms, p99={summary['p99_ms']} ms, "
+            f"timeouts={summary['connect_timeout']}s connect / {summary['read_timeout']}s read"
+        )
+
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,23 @@ import smtplib
 import hmac
 import hashlib
 import csv
+import random
 import io
+import base64
+import gzip
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from botocore.exceptions import ClientError
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pathlib import Path
-from secrets_loader import get_param, get_secret
+from secrets_loader import get_param, get_secret, prefetch
 
 dynamodb = boto3.resource("dynamodb")
 ses = boto3.client("ses")
@@ -25,6 +35,8 @@ FORM_CONFIG_TABLE = os.environ.get("FORM_CONFIG_TABLE", "formbridge-config")
 SES_SENDER = os.environ.get("SES_SENDER")  # verified sender email
 FRONTEND_ORIGIN = os.environ.get("FRONTEND_ORIGIN", "https://omdeshpande09012005.github.io/formbridge/")
 WEBHOOK_QUEUE_URL = os.environ.get("WEBHOOK_QUEUE_URL", "")  # optional SQS queue for webhooks
+WEBHOOK_FANOUT = os.environ.get("WEBHOOK_FANOUT", "false").lower() == "true"  # one message per endpoint
+WEBHOOK_MESSAGE_FORMAT = os.environ.get("WEBHOOK_MESSAGE_FORMAT", "ref").lower()  # "ref" or "inline"
 STAGE = os.environ.get("STAGE", "prod")  # Environment stage for SSM/Secrets paths
 HMAC_VERSION = int(os.environ.get("HMAC_VERSION", "1"))  # For cache invalidation
 
@@ -39,6 +51,14 @@ def load_config():
     if _config_cache:  # Already loaded
         return _config_cache
     
+    # Warm the secrets_loader cache in one bulk SSM call (plus the HMAC secret
+    # in parallel) so the lookups below are cache hits on a cold start
+    prefetch(
+        f"/formbridge/{STAGE}/",
+        decrypt=False,
+        secrets={f"formbridge/{STAGE}/HMAC_SECRET": "HMAC_SECRET"}
+    )
+    
     # Load SES recipients from SSM or env var
     ses_recipients_str = get_param(
         f"/formbridge/{STAGE}/ses/recipients",
@@ -100,6 +120,12 @@ SES_RECIPIENTS = os.environ.get("SES_RECIPIENTS", "")
 HMAC_ENABLED = os.environ.get("HMAC_ENABLED", "false").lower() == "true"
 HMAC_SKEW_SECS = int(os.environ.get("HMAC_SKEW_SECS", "300"))
 
+# Notification delivery: "sync" sends email inline, "async" enqueues a job
+# for notification_dispatcher.py (falls back to sync if the queue is unset)
+NOTIFY_MODE = os.environ.get("NOTIFY_MODE", "sync").lower()
+NOTIFICATION_QUEUE_URL = os.environ.get("NOTIFICATION_QUEUE_URL", "")
+NOTIFICATION_FIELDS = ["id", "ts", "name", "email", "message", "page", "ip", "ua"]
+
 # Email provider configuration
 SES_PROVIDER = os.environ.get("SES_PROVIDER", "ses")  # "ses" or "mailhog"
 MAILHOG_HOST = os.environ.get("MAILHOG_HOST", "localhost")
@@ -109,6 +135,58 @@ MAILHOG_PORT = int(os.environ.get("MAILHOG_PORT", "1025"))
 table = dynamodb.Table(DDB_TABLE)
 config_table = dynamodb.Table(FORM_CONFIG_TABLE)
 
+# Per-form config cache (bounded LRU with TTL, invalidated via config epoch)
+FORM_CONFIG_CACHE_TTL = int(os.environ.get("FORM_CONFIG_CACHE_TTL", "300"))  # 0 disables the cache
+FORM_CONFIG_NEGATIVE_TTL = int(os.environ.get("FORM_CONFIG_NEGATIVE_TTL", "60"))  # forms with no config
+FORM_CONFIG_CACHE_SIZE = int(os.environ.get("FORM_CONFIG_CACHE_SIZE", "256"))
+FORM_CONFIG_EPOCH_CHECK_SECS = int(os.environ.get("FORM_CONFIG_EPOCH_CHECK_SECS", "30"))
+
+_form_config_cache = OrderedDict()  # {form_id: (item_or_None, expires_at)}
+_form_config_lock = threading.Lock()
+_form_config_epoch = None
+_form_config_epoch_checked_at = 0.0
+_form_config_cache_stats = {"hits": 0, "misses": 0, "negative_hits": 0, "evictions": 0, "invalidations": 0}
+
+# Batch submissions (/submit/batch)
+SUBMIT_BATCH_MAX = int(os.environ.get("SUBMIT_BATCH_MAX", "500"))
+BATCH_WRITE_MAX_ATTEMPTS = int(os.environ.get("BATCH_WRITE_MAX_ATTEMPTS", "5"))
+
+# Submit-path I/O (config read, rollup, email, webhook enqueue) runs on a
+# shared pool so independent calls overlap instead of adding up
+SUBMIT_IO_WORKERS = int(os.environ.get("SUBMIT_IO_WORKERS", "8"))
+_submit_executor = None
+_submit_executor_lock = threading.Lock()
+
+# Analytics rollup items expire alongside the submissions they count
+ROLLUP_TTL_DAYS = int(os.environ.get("ROLLUP_TTL_DAYS", "90"))
+ANALYTICS_SCAN_MAX_ITEMS = 10000  # Cap for the legacy /analytics scan
+
+# Export pipeline (streamed to a spooled temp file; large/async exports go to an object store)
+EXPORT_BUCKET = os.environ.get("EXPORT_BUCKET", "")  # S3 bucket for export files
+EXPORT_LOCAL_DIR = os.environ.get("EXPORT_LOCAL_DIR", "")  # Local stand-in for the object store
+EXPORT_LOCAL_BASE_URL = os.environ.get("EXPORT_LOCAL_BASE_URL", "")  # Optional HTTP base for local files
+EXPORT_SYNC_MAX_BYTES = int(os.environ.get("EXPORT_SYNC_MAX_BYTES", str(5 * 1024 * 1024)))  # Under API Gateway's 6 MB
+EXPORT_SPOOL_MAX_BYTES = int(os.environ.get("EXPORT_SPOOL_MAX_BYTES", str(1024 * 1024)))  # In memory before /tmp
+EXPORT_URL_TTL = int(os.environ.get("EXPORT_URL_TTL", "3600"))  # Presigned URL lifetime (seconds)
+CURSOR_SECRET = os.environ.get("CURSOR_SECRET", "")  # Signs pagination cursors (else derived from the HMAC secret)
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", "1000"))
+EXPORT_ROW_GROUP_SIZE = int(os.environ.get("EXPORT_ROW_GROUP_SIZE", "1000"))  # Rows per columnar row group
+EXPORT_COLUMNS = ["id", "form_id", "name", "email", "message", "page", "ip", "ua", "ts"]
+_s3_client = None
+
+# Email template (compiled lazily, once per container)
+EMAIL_TEMPLATE_DIR = Path(__file__).parent / "email_templates"
+_PLACEHOLDER_RE = re.compile(r"\{\{(\w+)\}\}")
+_HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#39;',
+})
+_TEMPLATE_NOT_LOADED = object()
+_compiled_template = _TEMPLATE_NOT_LOADED
+
 
 def extract_ip_from_event(event):
     """Extract IP address from event context or headers."""
@@ -199,40 +277,56 @@ def send_email(subject, body_text, body_html, recipients, sender, reply_to=None)
 
 
 
-def response(status_code, body, headers=None, is_csv=False):
+def response(status_code, body, headers=None):
     """Build HTTP response with CORS headers."""
-    if is_csv:
-        default_headers = {
-            "Access-Control-Allow-Origin": FRONTEND_ORIGIN,
-            "Access-Control-Allow-Methods": "POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, X-Api-Key, X-Timestamp, X-Signature",
-            "Content-Type": "text/csv; charset=utf-8",
-            "Content-Disposition": body.get("filename", "attachment; filename=export.csv"),
-        }
-        if headers:
-            default_headers.update(headers)
-        
-        return {
-            "statusCode": status_code,
-            "headers": default_headers,
-            "body": body.get("csv_data", ""),
-            "isBase64Encoded": False,
-        }
-    else:
-        default_headers = {
-            "Access-Control-Allow-Origin": FRONTEND_ORIGIN,
-            "Access-Control-Allow-Methods": "POST, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, X-Api-Key, X-Timestamp, X-Signature",
-            "Content-Type": "application/json",
-        }
-        if headers:
-            default_headers.update(headers)
-        
+    default_headers = {
+        "Access-Control-Allow-Origin": FRONTEND_ORIGIN,
+        "Access-Control-Allow-Methods": "POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, X-Api-Key, X-Timestamp, X-Signature",
+        "Content-Type": "application/json",
+    }
+    if headers:
+        default_headers.update(headers)
+    
+    return {
+        "statusCode": status_code,
+        "headers": default_headers,
+        "body": json.dumps(body),
+    }
+
+
+def file_response(status_code, data, export_spec, filename, headers=None):
+    """
+    Build a file download response with CORS headers.
+    
+    Gzipped (.gz) bodies are base64-encoded (isBase64Encoded) as API Gateway
+    requires for binary payloads; text bodies are returned as-is.
+    """
+    default_headers = {
+        "Access-Control-Allow-Origin": FRONTEND_ORIGIN,
+        "Access-Control-Allow-Methods": "POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, X-Api-Key, X-Timestamp, X-Signature",
+        "Access-Control-Expose-Headers": "X-Next-Cursor, X-Row-Cap",
+        "Content-Type": export_spec["content_type"],
+        "Content-Disposition": f"attachment; filename={filename}",
+    }
+    if headers:
+        default_headers.update(headers)
+    
+    if export_spec["gzip"]:
         return {
             "statusCode": status_code,
             "headers": default_headers,
-            "body": json.dumps(body),
+            "body": base64.b64encode(data).decode("ascii"),
+            "isBase64Encoded": True,
         }
+    
+    return {
+        "statusCode": status_code,
+        "headers": default_headers,
+        "body": data.decode("utf-8"),
+        "isBase64Encoded": False,
+    }
 
 
 def verify_hmac_signature(event, raw_body):
@@ -306,11 +400,104 @@ def verify_hmac_signature(event, raw_body):
         return False, "invalid signature"
 
 
+def _check_config_epoch():
+    """
+    Flush the form config cache if the global config epoch has changed.
+    
+    The epoch item (pk=CONFIG#EPOCH, sk=CONFIG#EPOCH) is bumped by the seeding
+    scripts whenever any form config is written. It is polled at most once every
+    FORM_CONFIG_EPOCH_CHECK_SECS, so invalidation costs one small read per
+    container per interval instead of one read per submission.
+    """
+    global _form_config_epoch, _form_config_epoch_checked_at
+    
+    now = time.time()
+    if now - _form_config_epoch_checked_at < FORM_CONFIG_EPOCH_CHECK_SECS:
+        return
+    _form_config_epoch_checked_at = now
+    
+    try:
+        item = config_table.get_item(
+            Key={"pk": "CONFIG#EPOCH", "sk": "CONFIG#EPOCH"}
+        ).get("Item", {})
+        epoch = int(item.get("epoch", 0))
+    except Exception as e:
+        print(f"Warning: Failed to read config epoch: {e}. Keeping cached form configs.")
+        return
+    
+    if _form_config_epoch is not None and epoch != _form_config_epoch:
+        print(f"Config epoch changed ({_form_config_epoch} -> {epoch}), flushing form config cache")
+        invalidate_form_config_cache()
+    _form_config_epoch = epoch
+
+
+def _get_form_config_item(form_id):
+    """
+    Return the raw config item for form_id (or None), served from the LRU cache.
+    
+    Forms without a config item are cached as None for FORM_CONFIG_NEGATIVE_TTL.
+    Read errors propagate and are not cached.
+    """
+    if FORM_CONFIG_CACHE_TTL <= 0:
+        response = config_table.get_item(Key={"pk": f"FORM#{form_id}", "sk": "CONFIG#v1"})
+        return response.get("Item") or None
+    
+    _check_config_epoch()
+    
+    with _form_config_lock:
+        cached = _form_config_cache.get(form_id)
+        if cached is not None:
+            item, expires_at = cached
+            if time.time() < expires_at:
+                _form_config_cache.move_to_end(form_id)
+                _form_config_cache_stats["hits"] += 1
+                if item is None:
+                    _form_config_cache_stats["negative_hits"] += 1
+                return item
+            del _form_config_cache[form_id]
+        
+        _form_config_cache_stats["misses"] += 1
+    
+    response = config_table.get_item(Key={"pk": f"FORM#{form_id}", "sk": "CONFIG#v1"})
+    item = response.get("Item") or None
+    ttl = FORM_CONFIG_CACHE_TTL if item else FORM_CONFIG_NEGATIVE_TTL
+    
+    with _form_config_lock:
+        _form_config_cache[form_id] = (item, time.time() + ttl)
+        _form_config_cache.move_to_end(form_id)
+        while len(_form_config_cache) > FORM_CONFIG_CACHE_SIZE:
+            _form_config_cache.popitem(last=False)
+            _form_config_cache_stats["evictions"] += 1
+    
+    return item
+
+
+def invalidate_form_config_cache(form_id=None):
+    """Drop one form's cached config, or the whole cache if form_id is None."""
+    with _form_config_lock:
+        if form_id is None:
+            _form_config_cache.clear()
+        else:
+            _form_config_cache.pop(form_id, None)
+        _form_config_cache_stats["invalidations"] += 1
+
+
+def get_form_config_cache_stats():
+    """Return a snapshot of form config cache counters."""
+    with _form_config_lock:
+        return {
+            **_form_config_cache_stats,
+            "size": len(_form_config_cache),
+            "epoch": _form_config_epoch,
+        }
+
+
 def get_form_config(form_id):
     """
     Get per-form routing configuration from DynamoDB config table.
     
-    Query: pk=FORM#<form_id>, sk=CONFIG#v1
+    Query: pk=FORM#<form_id>, sk=CONFIG#v1 (cached per container, see
+    _get_form_config_item)
     
     Returns merged config with defaults:
     {
@@ -321,7 +508,8 @@ def get_form_config(form_id):
         "webhooks": [
             {"type": "slack", "url": "..."},
             {"type": "generic", "url": "...", "hmac_secret": "...", "hmac_header": "..."}
-        ]
+        ],
+        "version": 0
     }
     
     Falls back to global env defaults if config not found or table missing.
@@ -334,18 +522,12 @@ def get_form_config(form_id):
         "brand_primary_hex": global_config.get("brand_primary_hex", "#6D28D9"),
         "dashboard_url": global_config.get("dashboard_url", "https://omdeshpande09012005.github.io/formbridge/"),
         "webhooks": [],
+        "version": 0,
     }
     
     try:
         # Try to fetch form-specific config
-        response = config_table.get_item(
-            Key={
-                "pk": f"FORM#{form_id}",
-                "sk": "CONFIG#v1"
-            }
-        )
-        
-        item = response.get("Item", {})
+        item = _get_form_config_item(form_id)
         if item:
             # Merge config-table values over defaults
             if "recipients" in item and isinstance(item["recipients"], list):
@@ -358,6 +540,8 @@ def get_form_config(form_id):
                 config["dashboard_url"] = item["dashboard_url"]
             if "webhooks" in item and isinstance(item["webhooks"], list):
                 config["webhooks"] = item["webhooks"]
+            if "version" in item:
+                config["version"] = int(item["version"])
             
             print(f"Found form config for {form_id}: recipients={len(config['recipients'])}, webhooks={len(config['webhooks'])}, prefix={config['subject_prefix']}")
         else:
@@ -369,9 +553,58 @@ def get_form_config(form_id):
     return config
 
 
+def _escape_html(value):
+    """Escape HTML special characters in a single pass."""
+    return str(value).translate(_HTML_ESCAPE_TABLE)
 
 
-
+def load_email_template():
+    """
+    Load and compile the branded email template (once per container).
+    
+    The template is split into alternating literal and slot segments so that
+    rendering is a single join instead of one full-string replace per key.
+    Placeholders listed in template_manifest.json's required_placeholders are
+    validated at load time; missing ones are logged, not fatal.
+    
+    Returns:
+        tuple: (literals, slots) where len(literals) == len(slots) + 1,
+        or None if the template is not available.
+    """
+    global _compiled_template
+    
+    if _compiled_template is not _TEMPLATE_NOT_LOADED:
+        return _compiled_template
+    
+    template_path = EMAIL_TEMPLATE_DIR / "base.html"
+    try:
+        with open(template_path, 'r', encoding='utf-8') as f:
+            template_html = f.read()
+    except OSError as e:
+        print(f"Email template not found at {template_path} ({e}), using fallback HTML")
+        _compiled_template = None
+        return None
+    
+    # re.split with one capture group alternates literal, slot, literal, ...
+    parts = _PLACEHOLDER_RE.split(template_html)
+    literals = parts[0::2]
+    slots = parts[1::2]
+    
+    # Validate against manifest (best effort)
+    manifest_path = EMAIL_TEMPLATE_DIR / "template_manifest.json"
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        required = manifest.get("required_placeholders", [])
+        missing = [key for key in required if key not in slots]
+        if missing:
+            print(f"Warning: email template is missing required placeholders: {missing}")
+    except (OSError, ValueError) as e:
+        print(f"Email template manifest not loaded ({e}), skipping placeholder validation")
+    
+    _compiled_template = (literals, slots)
+    print(f"Email template compiled: {len(slots)} slots, {len(set(slots))} unique placeholders")
+    return _compiled_template
 
 
 def render_email_html(context):
@@ -389,25 +622,25 @@ def render_email_html(context):
         Returns plain text fallback if template not found or rendering fails
     """
     try:
-        # Try to load template from package
-        template_path = Path(__file__).parent / "email_templates" / "base.html"
+        start = time.perf_counter()
         
-        if not template_path.exists():
-            print(f"Email template not found at {template_path}, using fallback HTML")
+        compiled = load_email_template()
+        if compiled is None:
             return build_fallback_html(context)
         
-        with open(template_path, 'r', encoding='utf-8') as f:
-            template_html = f.read()
+        literals, slots = compiled
         
-        # Replace placeholders with escaped values
-        html = template_html
-        for key, value in context.items():
-            placeholder = f"{{{{{key}}}}}"
-            # Escape HTML special characters
-            escaped_value = str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&#39;')
-            html = html.replace(placeholder, escaped_value)
+        # Escape each context value once; unknown placeholders are left as-is
+        escaped = {key: _escape_html(value) for key, value in context.items()}
         
-        print("Email template rendered successfully")
+        chunks = [literals[0]]
+        for slot, literal in zip(slots, literals[1:]):
+            chunks.append(escaped.get(slot, f"{{{{{slot}}}}}"))
+            chunks.append(literal)
+        html = "".join(chunks)
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"Email template rendered successfully in {elapsed_ms:.2f}ms")
         return html
     
     except Exception as e:
@@ -459,11 +692,17 @@ def lambda_handler(event, context):
     Route requests to /submit, /analytics, or /export endpoint.
     
     /submit: Handle contact form submissions
+    /submit/batch: Store many submissions in one request
     /analytics: Return basic stats per form_id
     /export: Export submissions as CSV
+    /submissions: List submissions page by page (cursor pagination)
     """
     print(f"Received event: {json.dumps(event, default=str)}")
     
+    # Async export job (self-invoked by start_export_job)
+    if "export_job" in event:
+        return run_export_job(event["export_job"])
+    
     # Detect endpoint path (handle both API Gateway v1 and v2 formats)
     resource = event.get("resource") or event.get("rawPath", "")
     http_method = event.get("httpMethod") or event.get("requestContext", {}).get("http", {}).get("method", "")
@@ -471,10 +710,14 @@ def lambda_handler(event, context):
     print(f"Route: {http_method} {resource}")
     
     # Route to appropriate handler
-    if resource.endswith("/export") or "/export" in resource:
+    if resource.endswith("/submit/batch") or "/submit/batch" in resource:
+        return handle_submit_batch(event, context)
+    elif resource.endswith("/export") or "/export" in resource:
         return handle_export(event, context)
     elif resource.endswith("/analytics") or "/analytics" in resource:
         return handle_analytics(event, context)
+    elif resource.endswith("/submissions") or "/submissions" in resource:
+        return handle_submissions(event, context)
     elif resource.endswith("/submit") or "/submit" in resource:
         return handle_submit(event, context)
     else:
@@ -495,6 +738,245 @@ def parse_request_body(event):
         return None
 
 
+def record_submission_rollup(form_id, submission_id, ts, count=1):
+    """
+    Atomically bump the write-time analytics rollup for a form.
+    
+    Items (same table as submissions, outside the SUBMIT# prefix):
+        pk=FORM#<form_id>, sk=STATS#DAY#<YYYY-MM-DD>  -> count
+        pk=FORM#<form_id>, sk=STATS#TOTAL             -> total_submissions,
+                                                         latest_id, last_submission_ts
+    
+    The latest pointer only moves forward: if a newer submission already won
+    the race, the total is still incremented without touching the pointer.
+    
+    Returns True on success; failures are logged and never fail the submission.
+    """
+    pk = f"FORM#{form_id}"
+    day = ts[:10]  # ISO timestamp -> YYYY-MM-DD (UTC)
+    
+    try:
+        table.update_item(
+            Key={"pk": pk, "sk": f"STATS#DAY#{day}"},
+            UpdateExpression="ADD #count :n SET #ttl = if_not_exists(#ttl, :ttl)",
+            ExpressionAttributeNames={"#count": "count", "#ttl": "ttl"},
+            ExpressionAttributeValues={
+                ":n": count,
+                ":ttl": int(time.time()) + (ROLLUP_TTL_DAYS * 86400),
+            },
+        )
+        
+        try:
+            table.update_item(
+                Key={"pk": pk, "sk": "STATS#TOTAL"},
+                UpdateExpression="ADD total_submissions :n SET latest_id = :id, last_submission_ts = :ts",
+                # NULL pointers (left by an earlier empty seed) count as missing
+                ConditionExpression=(
+                    "attribute_not_exists(last_submission_ts) OR attribute_type(last_submission_ts, :null) "
+                    "OR last_submission_ts < :ts"
+                ),
+                ExpressionAttributeValues={":n": count, ":id": submission_id, ":ts": ts, ":null": "NULL"},
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            table.update_item(
+                Key={"pk": pk, "sk": "STATS#TOTAL"},
+                UpdateExpression="ADD total_submissions :n",
+                ExpressionAttributeValues={":n": count},
+            )
+        return True
+    
+    except Exception as e:
+        print(f"Warning: Failed to update analytics rollup for form_id={form_id}: {e}")
+        return False
+
+
+def read_analytics_rollup(form_id):
+    """
+    Build the /analytics response from rollup items with one BatchGetItem.
+    
+    Only a STATS#TOTAL item stamped with backfilled_at (by backfill_rollups.py
+    or seed_analytics_rollup) is trusted: without it the counters only cover
+    submissions since rollups were deployed.
+    
+    Returns the analytics dict, or None if the form has no trusted rollup.
+    """
+    pk = f"FORM#{form_id}"
+    today_utc = datetime.utcnow().date()
+    days = [(today_utc - timedelta(days=i)).isoformat() for i in range(6, -1, -1)]
+    
+    keys = [{"pk": pk, "sk": "STATS#TOTAL"}] + [{"pk": pk, "sk": f"STATS#DAY#{day}"} for day in days]
+    request_items = {DDB_TABLE: {"Keys": keys}}
+    items = []
+    
+    for attempt in range(5):
+        response_obj = dynamodb.batch_get_item(RequestItems=request_items)
+        items.extend(response_obj.get("Responses", {}).get(DDB_TABLE, []))
+        
+        request_items = response_obj.get("UnprocessedKeys") or {}
+        if not request_items:
+            break
+        time.sleep(0.05 * (2 ** attempt))
+    else:
+        raise RuntimeError("BatchGetItem left unprocessed rollup keys after retries")
+    
+    by_sk = {item["sk"]: item for item in items}
+    total_item = by_sk.get("STATS#TOTAL")
+    if total_item is None or not total_item.get("backfilled_at"):
+        return None
+    
+    last_7_days = [
+        {"date": day, "count": int(by_sk.get(f"STATS#DAY#{day}", {}).get("count", 0))}
+        for day in days
+    ]
+    
+    return {
+        "form_id": form_id,
+        "total_submissions": int(total_item.get("total_submissions", 0)),
+        "last_7_days": last_7_days,
+        "latest_id": total_item.get("latest_id"),
+        "last_submission_ts": total_item.get("last_submission_ts"),
+    }
+
+
+def compute_analytics_from_submissions(form_id):
+    """
+    Compute analytics by paging through SUBMIT# items (legacy path).
+    
+    Only used for forms without a trusted rollup; capped at
+    ANALYTICS_SCAN_MAX_ITEMS items.
+    """
+    # Query DynamoDB for all submissions with this form_id
+    # pk = FORM#{form_id}, sk begins with SUBMIT#
+    # Paginate to avoid huge scans; cap at ANALYTICS_SCAN_MAX_ITEMS
+    items = []
+    last_evaluated_key = None
+    max_items = ANALYTICS_SCAN_MAX_ITEMS  # TODO: add GSI for better analytics queries
+    
+    while len(items) < max_items:
+        query_params = {
+            "KeyConditionExpression": "pk = :pk AND begins_with(sk, :sk_prefix)",
+            "ExpressionAttributeValues": {
+                ":pk": f"FORM#{form_id}",
+                ":sk_prefix": "SUBMIT#",
+            },
+            "Limit": 100,  # Page size
+        }
+        
+        if last_evaluated_key:
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+        
+        response_obj = table.query(**query_params)
+        items.extend(response_obj.get("Items", []))
+        
+        last_evaluated_key = response_obj.get("LastEvaluatedKey")
+        if not last_evaluated_key:
+            break
+        
+        if len(items) >= max_items:
+            print(f"Reached item limit of {max_items}; stopping pagination")
+            break
+    
+    print(f"Retrieved {len(items)} submissions for {form_id}")
+    
+    # Compute statistics
+    total_submissions = len(items)
+    
+    # Build 7-day window (UTC calendar days)
+    today_utc = datetime.utcnow().date()
+    day_counts = {}
+    for i in range(7):
+        day = today_utc - timedelta(days=i)
+        day_counts[day.isoformat()] = 0
+    
+    # Count submissions per day
+    for item in items:
+        ts_str = item.get("ts", "")
+        try:
+            # Parse ISO timestamp (e.g., "2025-11-05T12:00:32.069092Z")
+            item_date = datetime.fromisoformat(ts_str.replace("Z", "+00:00")).date()
+            date_key = item_date.isoformat()
+            if date_key in day_counts:
+                day_counts[date_key] += 1
+        except Exception as e:
+            print(f"Error parsing timestamp {ts_str}: {e}")
+    
+    # Build last_7_days array (most recent first, chronological in response)
+    last_7_days = []
+    for i in range(6, -1, -1):  # 6 days ago to today
+        day = today_utc - timedelta(days=i)
+        day_key = day.isoformat()
+        last_7_days.append({"date": day_key, "count": day_counts[day_key]})
+    
+    # Find latest submission (items are sorted by sk ascending, so last item is newest)
+    latest_id = None
+    last_submission_ts = None
+    if items:
+        latest_item = items[-1]  # Last item in list (highest sk)
+        latest_id = latest_item.get("id")
+        last_submission_ts = latest_item.get("ts")
+    
+    # Build response
+    analytics_data = {
+        "form_id": form_id,
+        "total_submissions": total_submissions,
+        "last_7_days": last_7_days,
+        "latest_id": latest_id,
+        "last_submission_ts": last_submission_ts,
+    }
+    
+    return analytics_data
+
+
+def seed_analytics_rollup(form_id, analytics_data):
+    """
+    Overwrite a form's rollup with counts from a complete, non-empty legacy scan.
+    
+    Stamps STATS#TOTAL with backfilled_at so later requests read the rollup.
+    Only the last 7 day items are written (the only ones /analytics reads);
+    run backfill_rollups.py for full history. Conditional on the item not
+    being stamped yet, so a concurrent seed or backfill wins. Like the
+    backfill, a submission landing mid-seed may be counted twice or not at
+    all. Failures are logged and never fail the request.
+    """
+    pk = f"FORM#{form_id}"
+    now = int(time.time())
+    
+    try:
+        table.update_item(
+            Key={"pk": pk, "sk": "STATS#TOTAL"},
+            UpdateExpression=(
+                "SET total_submissions = :total, latest_id = :id, "
+                "last_submission_ts = :ts, backfilled_at = :at"
+            ),
+            ConditionExpression="attribute_not_exists(backfilled_at)",
+            ExpressionAttributeValues={
+                ":total": analytics_data["total_submissions"],
+                ":id": analytics_data["latest_id"],
+                ":ts": analytics_data["last_submission_ts"],
+                ":at": datetime.utcnow().isoformat() + "Z",
+            },
+        )
+        for day in analytics_data["last_7_days"]:
+            table.update_item(
+                Key={"pk": pk, "sk": f"STATS#DAY#{day['date']}"},
+                UpdateExpression="SET #count = :n, #ttl = if_not_exists(#ttl, :ttl)",
+                ExpressionAttributeNames={"#count": "count", "#ttl": "ttl"},
+                ExpressionAttributeValues={":n": day["count"], ":ttl": now + (ROLLUP_TTL_DAYS * 86400)},
+            )
+        print(f"Seeded analytics rollup for {form_id}: total={analytics_data['total_submissions']}")
+        return True
+    
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+            print(f"Warning: Failed to seed analytics rollup for form_id={form_id}: {e}")
+        return False
+    except Exception as e:
+        print(f"Warning: Failed to seed analytics rollup for form_id={form_id}: {e}")
+        return False
+
+
 def handle_analytics(event, context):
     """
     Handle POST /analytics - return form submission statistics.
@@ -504,6 +986,10 @@ def handle_analytics(event, context):
       "form_id": "contact-us"
     }
     
+    Counts come from write-time rollup items (see record_submission_rollup),
+    so this reads ~8 small items regardless of form volume. Forms whose
+    rollup hasn't been backfilled are scanned once and seeded.
+    
     Response:
     {
       "form_id": "contact-us",
@@ -540,85 +1026,17 @@ def handle_analytics(event, context):
     print(f"Fetching analytics for form_id: {form_id}")
     
     try:
-        # Query DynamoDB for all submissions with this form_id
-        # pk = FORM#{form_id}, sk begins with SUBMIT#
-        # Paginate to avoid huge scans; cap at 10K items
-        items = []
-        last_evaluated_key = None
-        max_items = 10000  # Cap for first pass; TODO: add GSI for better analytics queries
-        
-        while len(items) < max_items:
-            query_params = {
-                "KeyConditionExpression": "pk = :pk AND begins_with(sk, :sk_prefix)",
-                "ExpressionAttributeValues": {
-                    ":pk": f"FORM#{form_id}",
-                    ":sk_prefix": "SUBMIT#",
-                },
-                "Limit": 100,  # Page size
-            }
-            
-            if last_evaluated_key:
-                query_params["ExclusiveStartKey"] = last_evaluated_key
-            
-            response_obj = table.query(**query_params)
-            items.extend(response_obj.get("Items", []))
-            
-            last_evaluated_key = response_obj.get("LastEvaluatedKey")
-            if not last_evaluated_key:
-                break
-            
-            if len(items) >= max_items:
-                print(f"Reached item limit of {max_items}; stopping pagination")
-                break
-        
-        print(f"Retrieved {len(items)} submissions for {form_id}")
-        
-        # Compute statistics
-        total_submissions = len(items)
-        
-        # Build 7-day window (UTC calendar days)
-        from datetime import timedelta
-        today_utc = datetime.utcnow().date()
-        day_counts = {}
-        for i in range(7):
-            day = today_utc - timedelta(days=i)
-            day_counts[day.isoformat()] = 0
-        
-        # Count submissions per day
-        for item in items:
-            ts_str = item.get("ts", "")
-            try:
-                # Parse ISO timestamp (e.g., "2025-11-05T12:00:32.069092Z")
-                item_date = datetime.fromisoformat(ts_str.replace("Z", "+00:00")).date()
-                date_key = item_date.isoformat()
-                if date_key in day_counts:
-                    day_counts[date_key] += 1
-            except Exception as e:
-                print(f"Error parsing timestamp {ts_str}: {e}")
-        
-        # Build last_7_days array (most recent first, chronological in response)
-        last_7_days = []
-        for i in range(6, -1, -1):  # 6 days ago to today
-            day = today_utc - timedelta(days=i)
-            day_key = day.isoformat()
-            last_7_days.append({"date": day_key, "count": day_counts[day_key]})
-        
-        # Find latest submission (items are sorted by sk ascending, so last item is newest)
-        latest_id = None
-        last_submission_ts = None
-        if items:
-            latest_item = items[-1]  # Last item in list (highest sk)
-            latest_id = latest_item.get("id")
-            last_submission_ts = latest_item.get("ts")
-        
-        # Build response
-        analytics_data = {
-            "form_id": form_id,
-            "total_submissions": total_submissions,
-            "last_7_days": last_7_days,
-            "latest_id": latest_id,
-            "last_submission_ts": last_submission_ts,
-        }
+        analytics_data = read_analytics_rollup(form_id)
+        if analytics_data is None:
+            # No trusted rollup yet (new form, or predates rollups and hasn't been backfilled)
+            print(f"No backfilled rollup for {form_id}; falling back to submission scan")
+            analytics_data = compute_analytics_from_submissions(form_id)
+            # Nothing to seed for a form without submissions (or an unknown
+            # form_id): its first submission creates the rollup
+            if 0 < analytics_data["total_submissions"] < ANALYTICS_SCAN_MAX_ITEMS:
+                seed_analytics_rollup(form_id, analytics_data)
+            else:
+                print(f"Scan for {form_id} hit the item cap; run backfill_rollups.py to build its rollup")
         
         return response(200, analytics_data)
     
@@ -630,38 +1048,36 @@ def handle_analytics(event, context):
         return response(500, {"error": "internal error"})
 
 
-def handle_export(event, context):
+def _parse_iso_utc(value):
+    """Parse an ISO 8601 timestamp (or date) into a naive UTC datetime."""
+    dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def parse_export_window(payload):
     """
-    Handle POST /export - export submissions as CSV.
+    Resolve the export time window from the request payload.
     
-    Request body:
-    {
-      "form_id": "contact-us",
-      "days": 7
-    }
+    Explicit "from"/"to" timestamps win over "days" (default 7, clamped to
+    [1, 90]). "to" defaults to now.
     
-    Response: text/csv with submissions
+    Returns:
+        tuple: (start_dt, end_dt, label) as naive UTC datetimes plus a short
+        label for the filename. Raises ValueError on malformed input.
     """
-    print("Export request received")
-    
-    # Verify HMAC if enabled
-    raw_body = event.get("body", "")
-    if isinstance(raw_body, dict):
-        raw_body = json.dumps(raw_body)
-    
-    is_valid, error_msg = verify_hmac_signature(event, raw_body)
-    if not is_valid:
-        return response(401, {"error": error_msg})
-    
-    # Parse request body
-    payload = parse_request_body(event)
-    if payload is None:
-        return response(400, {"error": "Invalid JSON payload"})
+    now = datetime.utcnow()
     
-    # Extract and validate form_id
-    form_id = (payload.get("form_id") or "").strip()
-    if not form_id:
-        return response(400, {"error": "form_id required"})
+    if payload.get("from") or payload.get("to"):
+        try:
+            end_dt = _parse_iso_utc(payload["to"]) if payload.get("to") else now
+            start_dt = _parse_iso_utc(payload["from"]) if payload.get("from") else end_dt - timedelta(days=7)
+        except (ValueError, TypeError):
+            raise ValueError("from/to must be ISO 8601 timestamps")
+        if start_dt > end_dt:
+            raise ValueError("from must be before to")
+        return start_dt, end_dt, f"{start_dt:%Y%m%d}-{end_dt:%Y%m%d}"
     
     # Extract days parameter (default 7, max 90)
     try:
@@ -670,177 +1086,558 @@ def handle_export(event, context):
     except (ValueError, TypeError):
         days = 7
     
-    print(f"Exporting {days} days for form_id: {form_id}")
+    return now - timedelta(days=days), now, f"{days}d"
+
+
+def submission_sort_key_range(start_dt, end_dt):
+    """
+    Build inclusive sk bounds for SUBMIT#<iso-ts>#<uuid> items in a window.
     
-    try:
-        # Query DynamoDB for submissions
-        items = []
-        last_evaluated_key = None
-        max_items = 10000  # Cap for CSV export
-        cutoff_ts = datetime.utcnow() - timedelta(days=days)
-        
-        while len(items) < max_items:
-            query_params = {
-                "KeyConditionExpression": "pk = :pk AND begins_with(sk, :sk_prefix)",
-                "ExpressionAttributeValues": {
-                    ":pk": f"FORM#{form_id}",
-                    ":sk_prefix": "SUBMIT#",
-                },
-                "Limit": 100,
-            }
-            
-            if last_evaluated_key:
-                query_params["ExclusiveStartKey"] = last_evaluated_key
-            
-            response_obj = table.query(**query_params)
-            items.extend(response_obj.get("Items", []))
-            
-            last_evaluated_key = response_obj.get("LastEvaluatedKey")
-            if not last_evaluated_key:
-                break
-            
-            if len(items) >= max_items:
-                print(f"Reached item limit of {max_items}; stopping pagination")
-                break
-        
-        print(f"Retrieved {len(items)} submissions for export")
-        
-        # Filter by date range
-        filtered_items = []
-        for item in items:
-            ts_str = item.get("ts", "")
-            try:
-                item_dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                if item_dt >= cutoff_ts:
-                    filtered_items.append(item)
-            except Exception as e:
-                print(f"Error parsing timestamp {ts_str}: {e}")
-        
-        print(f"After date filter: {len(filtered_items)} submissions")
-        
-        # Build CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Headers
-        headers = ["id", "form_id", "name", "email", "message", "page", "ip", "ua", "ts"]
-        writer.writerow(headers)
-        
-        # Rows
-        for item in sorted(filtered_items, key=lambda x: x.get("ts", "")):  # Sort by timestamp
-            writer.writerow([
-                item.get("id", ""),
-                item.get("form_id", ""),
-                item.get("name", ""),
-                item.get("email", ""),
-                item.get("message", ""),
-                item.get("page", ""),
-                item.get("ip", ""),
-                item.get("ua", ""),
-                item.get("ts", ""),
-            ])
-        
-        csv_data = output.getvalue()
-        output.close()
-        
-        # Build filename
-        now_str = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"attachment; filename=formbridge_{form_id}_{days}d_{now_str}.csv"
-        
-        response_headers = {}
-        if len(filtered_items) >= max_items:
-            response_headers["X-Row-Cap"] = str(max_items)
-        
-        return response(
-            200,
-            {
-                "csv_data": csv_data,
-                "filename": filename,
-            },
-            headers=response_headers,
-            is_csv=True
-        )
+    Timestamps are stored as datetime.isoformat() + "Z", so they sort
+    lexicographically by time. The upper bound gets a "~" suffix so every
+    item stamped within the last microsecond of the window still matches.
+    """
+    return (
+        f"SUBMIT#{start_dt.isoformat(timespec='microseconds')}",
+        f"SUBMIT#{end_dt.isoformat(timespec='microseconds')}~",
+    )
+
+
+def iter_submissions(form_id, sk_from, sk_to, page_size=100):
+    """
+    Yield SUBMIT# items for a form inside [sk_from, sk_to], in sk (time) order.
     
-    except ClientError as e:
-        print(f"DynamoDB query failed: {e}")
-        return response(500, {"error": "internal error querying data"})
-    except Exception as e:
-        print(f"Unexpected error in export: {e}")
-        return response(500, {"error": "internal error"})
+    Pages through the query lazily so callers never hold more than one page.
+    """
+    last_evaluated_key = None
+    
+    while True:
+        items, last_evaluated_key = query_submissions_page(
+            form_id, sk_from, sk_to, page_size, last_evaluated_key
+        )
+        yield from items
+        
+        if not last_evaluated_key:
+            break
+
+
+def _csv_rows(items, text):
+    """CSV writer: header row, then one row per item."""
+    writer = csv.writer(text)
+    writer.writerow(EXPORT_COLUMNS)
+    for item in items:
+        writer.writerow([item.get(column, "") for column in EXPORT_COLUMNS])
+        yield
+
 
+def _ndjson_rows(items, text):
+    """NDJSON writer: one compact JSON object per line."""
+    for item in items:
+        text.write(json.dumps({column: item.get(column, "") for column in EXPORT_COLUMNS}, separators=(",", ":"), ensure_ascii=False))
+        text.write("\n")
+        yield
 
-def enqueue_webhooks(form_id, submission_data, webhooks_config):
+
+def _columnar_rows(items, text):
     """
-    Enqueue webhook dispatch job to SQS.
+    Columnar writer: a JSON document of column-oriented row groups.
     
-    Args:
-        form_id: Form identifier
-        submission_data: Form submission data (name, email, message, page, ip, ua, etc)
-        webhooks_config: List of webhook configs [{type, url, hmac_secret?, ...}]
+    {"format": "formbridge-columnar", "version": 1, "columns": [...],
+     "row_groups": [{"rows": N, "columns": {"id": [...], ...}}, ...]}
     
-    Returns:
-        bool: True if enqueued successfully or no webhooks; False if SQS error
+    Row groups hold at most EXPORT_ROW_GROUP_SIZE rows, so memory stays
+    bounded while loaders still get one array per column. Each row yields
+    the (estimated) size of the group still held in memory, so
+    write_export's byte cap also counts rows that aren't written yet.
     """
-    if not WEBHOOK_QUEUE_URL:
-        print("WEBHOOK_QUEUE_URL not configured, skipping webhook enqueue")
-        return True  # Not an error - webhooks optional
+    text.write(json.dumps({"format": "formbridge-columnar", "version": 1, "columns": EXPORT_COLUMNS})[:-1])
+    text.write(',"row_groups":[')
+    group = {column: [] for column in EXPORT_COLUMNS}
+    group_rows = 0
+    group_bytes = 0
+    groups_written = 0
     
-    if not webhooks_config or len(webhooks_config) == 0:
-        print(f"No webhooks configured for form_id={form_id}")
-        return True  # Not an error
+    def flush_group():
+        text.write("," if groups_written else "")
+        text.write(json.dumps({"rows": group_rows, "columns": group}, separators=(",", ":"), ensure_ascii=False))
     
     try:
-        # Build SQS message payload
-        # Includes full submission data + webhooks array
-        message_body = {
-            "form_id": form_id,
-            "id": submission_data.get("id"),
-            "ts": submission_data.get("ts"),
-            "name": submission_data.get("name"),
-            "email": submission_data.get("email"),
-            "message": submission_data.get("message"),
-            "page": submission_data.get("page"),
-            "ip": submission_data.get("ip"),
-            "ua": submission_data.get("ua"),
-            "brand_primary_hex": submission_data.get("brand_primary_hex"),
-            "webhooks": webhooks_config,
-        }
-        
-        # Send to SQS
-        response = sqs.send_message(
-            QueueUrl=WEBHOOK_QUEUE_URL,
-            MessageBody=json.dumps(message_body),
-            MessageAttributes={
-                "form_id": {"StringValue": form_id, "DataType": "String"},
-                "webhook_count": {"StringValue": str(len(webhooks_config)), "DataType": "Number"},
-            }
+        for item in items:
+            for column in EXPORT_COLUMNS:
+                value = item.get(column, "")
+                group[column].append(value)
+                group_bytes += len(json.dumps(value, ensure_ascii=False).encode("utf-8")) + 1
+            group_rows += 1
+            if group_rows >= EXPORT_ROW_GROUP_SIZE:
+                flush_group()
+                groups_written += 1
+                group = {column: [] for column in EXPORT_COLUMNS}
+                group_rows = 0
+                group_bytes = 0
+            yield group_bytes
+    finally:
+        # Runs on normal completion and on truncation (generator close)
+        if group_rows:
+            flush_group()
+        text.write("]}")
+
+
+# Export formats: row writer, MIME type and file extension
+EXPORT_FORMATS = {
+    "csv": {"writer": _csv_rows, "content_type": "text/csv; charset=utf-8", "extension": "csv"},
+    "ndjson": {"writer": _ndjson_rows, "content_type": "application/x-ndjson", "extension": "ndjson"},
+    "columnar": {"writer": _columnar_rows, "content_type": "application/json", "extension": "columnar.json"},
+}
+
+
+def parse_export_format(payload):
+    """
+    Resolve the export format from the payload.
+    
+    "format" may be csv (default), ndjson or columnar, optionally with a
+    ".gz" suffix for a gzip file download (application/gzip, which API
+    Gateway passes through as binary). Compression is opt-in only:
+    Accept-Encoding is ignored, since browsers always send it and a gzipped
+    text/csv body would reach them as base64 text.
+    
+    Returns:
+        dict: {"format", "gzip", "content_type", "extension"}
+        Raises ValueError for unknown formats.
+    """
+    requested = str(payload.get("format") or "csv").strip().lower()
+    gzip_file = requested.endswith(".gz")
+    base_format = requested[:-3] if gzip_file else requested
+    
+    if base_format not in EXPORT_FORMATS:
+        raise ValueError(f"unsupported format '{requested}' (use csv, ndjson, columnar, optionally with .gz)")
+    
+    spec = EXPORT_FORMATS[base_format]
+    
+    if gzip_file:
+        return {
+            "format": base_format,
+            "gzip": True,
+            "content_type": "application/gzip",
+            "extension": f"{spec['extension']}.gz",
+        }
+    
+    return {
+        "format": base_format,
+        "gzip": False,
+        "content_type": spec["content_type"],
+        "extension": spec["extension"],
+    }
+
+
+def write_export(items, fileobj, export_spec, max_bytes=None):
+    """
+    Stream items into a binary file object in the requested format.
+    
+    Gzip (if requested) is applied on the fly. Stops early (truncated=True)
+    once the uncompressed output reaches max_bytes, checked after every
+    row and including any rows a writer still buffers (columnar groups),
+    so the output overshoots by at most one row.
+    
+    Returns:
+        tuple: (rows_written, truncated)
+    """
+    sink = gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=6) if export_spec["gzip"] else fileobj
+    text = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+    rows_writer = EXPORT_FORMATS[export_spec["format"]]["writer"](items, text)
+    
+    rows = 0
+    truncated = False
+    try:
+        for buffered_bytes in rows_writer:
+            rows += 1
+            
+            if max_bytes is not None:
+                text.flush()
+                if sink.tell() + (buffered_bytes or 0) >= max_bytes:
+                    truncated = True
+                    print(f"Export reached {max_bytes} bytes after {rows} rows; truncating")
+                    break
+    finally:
+        rows_writer.close()
+    
+    text.flush()
+    text.detach()  # Leave fileobj open for the caller
+    if sink is not fileobj:
+        sink.close()  # Writes the gzip trailer; does not close fileobj
+    return rows, truncated
+
+
+@contextmanager
+def build_export_file(form_id, sk_from, sk_to, export_spec, max_bytes=None):
+    """
+    Build an export into a spooled temp file (memory first, then /tmp).
+    
+    Yields:
+        tuple: (spool, rows, truncated)
+    """
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES, mode="w+b") as spool:
+        rows, truncated = write_export(
+            iter_submissions(form_id, sk_from, sk_to),
+            spool,
+            export_spec,
+            max_bytes=max_bytes,
         )
+        yield spool, rows, truncated
+
+
+def _get_s3_client():
+    """Create the S3 client on first use (only export jobs need it)."""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client("s3")
+    return _s3_client
+
+
+def store_export_file(job, fileobj, rows):
+    """
+    Upload a finished export to the object store and return the job result.
+    
+    Uses S3 when EXPORT_BUCKET is set, else copies into EXPORT_LOCAL_DIR
+    (a local stand-in for development and tests).
+    """
+    key = export_object_key(job)
+    
+    if EXPORT_BUCKET:
+        extra_args = {
+            "ContentType": job["export"]["content_type"],
+            "ContentDisposition": f"attachment; filename={job['filename']}",
+        }
+        _get_s3_client().upload_fileobj(fileobj, EXPORT_BUCKET, key, ExtraArgs=extra_args)
+    elif EXPORT_LOCAL_DIR:
+        path = Path(EXPORT_LOCAL_DIR) / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+    else:
+        raise RuntimeError("No export store configured (set EXPORT_BUCKET or EXPORT_LOCAL_DIR)")
+    
+    print(f"Export job {job['job_id']} stored: key={key}, rows={rows}")
+    return {
+        "job_id": job["job_id"],
+        "status": "complete",
+        "rows": rows,
+        "download_url": export_download_url(key),
+    }
+
+
+def export_object_key(job):
+    """Object store key for an export job's file."""
+    return f"exports/{job['form_id']}/{job['job_id']}.{job['export']['extension']}"
+
+
+def export_download_url(key):
+    """Return a download link for an export object (presigned for S3)."""
+    if EXPORT_BUCKET:
+        return _get_s3_client().generate_presigned_url(
+            "get_object",
+            Params={"Bucket": EXPORT_BUCKET, "Key": key},
+            ExpiresIn=EXPORT_URL_TTL,
+        )
+    if EXPORT_LOCAL_BASE_URL:
+        return f"{EXPORT_LOCAL_BASE_URL.rstrip('/')}/{key}"
+    return (Path(EXPORT_LOCAL_DIR) / key).resolve().as_uri()
+
+
+def run_export_job(job):
+    """Build an export end-to-end and store it (async job body)."""
+    print(f"Running export job {job['job_id']} for form_id={job['form_id']}")
+    with build_export_file(job["form_id"], job["sk_from"], job["sk_to"], job["export"]) as (spool, rows, _):
+        spool.seek(0)
+        return store_export_file(job, spool, rows)
+
+
+def start_export_job(job, context):
+    """
+    Start an asynchronous export job.
+    
+    In Lambda (with an S3 bucket) the function re-invokes itself with
+    InvocationType=Event and returns 202 immediately; the download link is
+    valid once the object lands. Elsewhere (local dev) the job runs inline.
+    """
+    if not (EXPORT_BUCKET or EXPORT_LOCAL_DIR):
+        return response(400, {"error": "async export requires EXPORT_BUCKET or EXPORT_LOCAL_DIR"})
+    
+    function_arn = getattr(context, "invoked_function_arn", None)
+    if EXPORT_BUCKET and function_arn:
+        boto3.client("lambda").invoke(
+            FunctionName=function_arn,
+            InvocationType="Event",
+            Payload=json.dumps({"export_job": job}).encode("utf-8"),
+        )
+        key = export_object_key(job)
+        print(f"Queued export job {job['job_id']} for form_id={job['form_id']}")
+        return response(202, {
+            "job_id": job["job_id"],
+            "status": "queued",
+            "download_url": export_download_url(key),
+        })
+    
+    return response(200, run_export_job(job))
+
+
+def _cursor_signing_key():
+    """
+    Key used to sign pagination cursors, derived from CURSOR_SECRET or,
+    failing that, the HMAC secret (so it never equals the request-signing key).
+    
+    Raises RuntimeError if neither is configured: a guessable fallback key
+    would let anyone forge cursors, so paging is refused instead.
+    """
+    if not cursor_signing_configured():
+        raise RuntimeError(CURSOR_KEY_MISSING)
+    secret = CURSOR_SECRET or load_config().get("hmac_secret")
+    return hmac.new(secret.encode("utf-8"), b"formbridge-cursor-v1", hashlib.sha256).digest()
+
+
+CURSOR_KEY_MISSING = "pagination requires CURSOR_SECRET or HMAC_SECRET"
+
+
+def cursor_signing_configured():
+    """True if a secret is configured to sign pagination cursors."""
+    return bool(CURSOR_SECRET or load_config().get("hmac_secret"))
+
+
+def encode_cursor(form_id, sk_from, sk_to, last_evaluated_key):
+    """
+    Encode a DynamoDB LastEvaluatedKey as an opaque, signed cursor.
+    
+    The cursor also pins the form and key window of the first page, so a
+    "last N days" listing doesn't drift while the caller pages through it.
+    """
+    payload = json.dumps(
+        {"form_id": form_id, "from": sk_from, "to": sk_to, "key": last_evaluated_key},
+        separators=(",", ":"),
+        sort_keys=True,
+    ).encode("utf-8")
+    signature = hmac.new(_cursor_signing_key(), payload, hashlib.sha256).digest()[:16]
+    return (
+        base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+        + "."
+        + base64.urlsafe_b64encode(signature).decode("ascii").rstrip("=")
+    )
+
+
+def decode_cursor(cursor, form_id):
+    """
+    Verify and decode a cursor produced by encode_cursor.
+    
+    Returns:
+        tuple: (sk_from, sk_to, exclusive_start_key). Raises ValueError if the
+        cursor is malformed, tampered with, or belongs to another form.
+    """
+    try:
+        payload_b64, signature_b64 = str(cursor).split(".", 1)
+        payload = base64.urlsafe_b64decode(payload_b64 + "=" * (-len(payload_b64) % 4))
+        signature = base64.urlsafe_b64decode(signature_b64 + "=" * (-len(signature_b64) % 4))
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    
+    expected = hmac.new(_cursor_signing_key(), payload, hashlib.sha256).digest()[:16]
+    if not hmac.compare_digest(expected, signature):
+        raise ValueError("invalid cursor")
+    
+    data = json.loads(payload)
+    key = data.get("key") or {}
+    if data.get("form_id") != form_id or key.get("pk") != f"FORM#{form_id}":
+        raise ValueError("cursor does not match form_id")
+    if not (data["from"] <= key.get("sk", "") <= data["to"]):
+        raise ValueError("invalid cursor")
+    
+    return data["from"], data["to"], key
+
+
+def parse_page_size(payload, default=100):
+    """Read page_size from the payload, clamped to [1, MAX_PAGE_SIZE]."""
+    try:
+        page_size = int(payload.get("page_size", default))
+    except (ValueError, TypeError):
+        page_size = default
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+def query_submissions_page(form_id, sk_from, sk_to, page_size, exclusive_start_key=None):
+    """
+    Read one page of SUBMIT# items in [sk_from, sk_to].
+    
+    Returns:
+        tuple: (items, last_evaluated_key_or_None)
+    """
+    query_params = {
+        "KeyConditionExpression": "pk = :pk AND sk BETWEEN :sk_from AND :sk_to",
+        "ExpressionAttributeValues": {
+            ":pk": f"FORM#{form_id}",
+            ":sk_from": sk_from,
+            ":sk_to": sk_to,
+        },
+        "Limit": page_size,
+    }
+    if exclusive_start_key:
+        query_params["ExclusiveStartKey"] = exclusive_start_key
+    
+    response_obj = table.query(**query_params)
+    return response_obj.get("Items", []), response_obj.get("LastEvaluatedKey")
+
+
+def resolve_page_request(payload, form_id):
+    """
+    Resolve the key window and start key for a paged read.
+    
+    A cursor carries its own window; otherwise days/from/to are used.
+    
+    Returns:
+        tuple: (sk_from, sk_to, exclusive_start_key, window_label).
+        Raises ValueError on a bad cursor or window.
+    """
+    cursor = payload.get("cursor")
+    if cursor:
+        sk_from, sk_to, start_key = decode_cursor(cursor, form_id)
+        return sk_from, sk_to, start_key, "page"
+    
+    start_dt, end_dt, window_label = parse_export_window(payload)
+    sk_from, sk_to = submission_sort_key_range(start_dt, end_dt)
+    return sk_from, sk_to, None, window_label
+
+
+def handle_submissions(event, context):
+    """
+    Handle POST /submissions - list submissions one page at a time.
+    
+    Request body:
+    {
+      "form_id": "contact-us",
+      "page_size": 100,            # optional, 1..MAX_PAGE_SIZE
+      "cursor": "<next_cursor>",   # optional, from the previous page
+      "days": 7                    # or from/to, as for /export (first page only)
+    }
+    
+    Response:
+    {
+      "form_id": "contact-us",
+      "items": [{"id": ..., "name": ..., ...}],
+      "count": 100,
+      "next_cursor": "<opaque>" | null
+    }
+    """
+    print("Submissions list request received")
+    
+    # Verify HMAC if enabled
+    raw_body = event.get("body", "")
+    if isinstance(raw_body, dict):
+        raw_body = json.dumps(raw_body)
+    
+    is_valid, error_msg = verify_hmac_signature(event, raw_body)
+    if not is_valid:
+        return response(401, {"error": error_msg})
+    
+    # Parse request body
+    payload = parse_request_body(event)
+    if payload is None:
+        return response(400, {"error": "Invalid JSON payload"})
+    
+    # Extract and validate form_id
+    form_id = (payload.get("form_id") or "").strip()
+    if not form_id:
+        return response(400, {"error": "form_id required"})
+    
+    if not cursor_signing_configured():
+        return response(400, {"error": CURSOR_KEY_MISSING})
+    
+    try:
+        sk_from, sk_to, start_key, _ = resolve_page_request(payload, form_id)
+    except ValueError as e:
+        return response(400, {"error": str(e)})
+    
+    try:
+        page_size = parse_page_size(payload)
+        items, last_evaluated_key = query_submissions_page(form_id, sk_from, sk_to, page_size, start_key)
         
-        message_id = response.get("MessageId")
-        print(f"Enqueued webhooks: form_id={form_id}, webhooks={len(webhooks_config)}, message_id={message_id}")
-        return True
+        next_cursor = None
+        if last_evaluated_key:
+            next_cursor = encode_cursor(form_id, sk_from, sk_to, last_evaluated_key)
+        
+        print(f"Listed {len(items)} submissions for {form_id}, more={next_cursor is not None}")
+        return response(200, {
+            "form_id": form_id,
+            "items": [{column: item.get(column, "") for column in EXPORT_COLUMNS} for item in items],
+            "count": len(items),
+            "next_cursor": next_cursor,
+        })
     
+    except ClientError as e:
+        print(f"DynamoDB query failed: {e}")
+        return response(500, {"error": "internal error querying data"})
     except Exception as e:
-        print(f"Warning: Failed to enqueue webhooks for form_id={form_id}: {e}. Continuing without webhook dispatch.")
-        return False  # Log but don't fail the submission
+        print(f"Unexpected error listing submissions: {e}")
+        return response(500, {"error": "internal error"})
 
 
-def handle_submit(event, context):
+def export_page(form_id, sk_from, sk_to, start_key, page_size, export_spec):
+    """Return one page of an export, with X-Next-Cursor if more remain."""
+    try:
+        items, last_evaluated_key = query_submissions_page(form_id, sk_from, sk_to, page_size, start_key)
+        
+        output = io.BytesIO()
+        write_export(items, output, export_spec)
+        
+        response_headers = {}
+        if last_evaluated_key:
+            response_headers["X-Next-Cursor"] = encode_cursor(form_id, sk_from, sk_to, last_evaluated_key)
+        
+        now_str = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        print(f"Export page: rows={len(items)}, more={last_evaluated_key is not None}")
+        return file_response(
+            200,
+            output.getvalue(),
+            export_spec,
+            f"formbridge_{form_id}_page_{now_str}.{export_spec['extension']}",
+            headers=response_headers,
+        )
+    
+    except ClientError as e:
+        print(f"DynamoDB query failed: {e}")
+        return response(500, {"error": "internal error querying data"})
+    except Exception as e:
+        print(f"Unexpected error in export: {e}")
+        return response(500, {"error": "internal error"})
+
+
+def handle_export(event, context):
     """
-    Handle POST /submit - store contact form submissions.
+    Handle POST /export - export submissions as CSV, NDJSON or columnar JSON.
     
     Request body:
     {
-      "form_id": "default",
-      "name": "John Doe",
-      "email": "john@example.com",
-      "message": "Your message here",
-      "page": "https://example.com/contact"
+      "form_id": "contact-us",
+      "format": "csv",                     # csv | ndjson | columnar, optional .gz suffix
+      "days": 7,                           # or an explicit window:
+      "from": "2025-11-01T00:00:00Z",      # optional, overrides days
+      "to": "2025-11-05T00:00:00Z",        # optional, defaults to now
+      "page_size": 1000,                   # optional, enables paged mode
+      "cursor": "<X-Next-Cursor>"          # optional, continues a paged export
     }
     
-    Returns: {"id": "<submission-id>"}
+    In paged mode each response is one CSV page (with header row) and the
+    X-Next-Cursor header carries the cursor for the next page, if any.
+    
+    The window is pushed into the key condition (sk BETWEEN), so only rows
+    inside it are read. Rows are streamed page by page into a spooled temp
+    file, so memory stays flat regardless of export size.
+    
+    A ".gz" format returns a gzip file (application/gzip, base64-encoded
+    for API Gateway's binary handling); Accept-Encoding is not negotiated.
+    
+    Response:
+        - the export file if it fits in one API response
+        - JSON {"job_id", "status", "download_url", ...} when the export is
+          larger than EXPORT_SYNC_MAX_BYTES or "mode": "async" is requested
+          (requires EXPORT_BUCKET or EXPORT_LOCAL_DIR)
     """
-    print("Submit request received")
+    print("Export request received")
     
     # Verify HMAC if enabled
     raw_body = event.get("body", "")
@@ -856,6 +1653,227 @@ def handle_submit(event, context):
     if payload is None:
         return response(400, {"error": "Invalid JSON payload"})
     
+    # Extract and validate form_id
+    form_id = (payload.get("form_id") or "").strip()
+    if not form_id:
+        return response(400, {"error": "form_id required"})
+    
+    if ("page_size" in payload or payload.get("cursor")) and not cursor_signing_configured():
+        return response(400, {"error": CURSOR_KEY_MISSING})
+    
+    # Resolve export window (cursor, explicit from/to, else last N days)
+    try:
+        sk_from, sk_to, start_key, window_label = resolve_page_request(payload, form_id)
+    except ValueError as e:
+        return response(400, {"error": str(e)})
+    
+    try:
+        export_spec = parse_export_format(payload)
+    except ValueError as e:
+        return response(400, {"error": str(e)})
+    
+    print(f"Exporting {window_label} as {export_spec['extension']} for form_id: {form_id} ({sk_from} .. {sk_to})")
+    
+    if "page_size" in payload or start_key:
+        return export_page(form_id, sk_from, sk_to, start_key, parse_page_size(payload), export_spec)
+    
+    now_str = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "form_id": form_id,
+        "sk_from": sk_from,
+        "sk_to": sk_to,
+        "export": export_spec,
+        "filename": f"formbridge_{form_id}_{window_label}_{now_str}.{export_spec['extension']}",
+    }
+    
+    try:
+        if payload.get("mode") == "async":
+            return start_export_job(job, context)
+        
+        # Without an object store the response body is the only way out,
+        # so stop writing once it would exceed the API Gateway payload limit
+        store_configured = bool(EXPORT_BUCKET or EXPORT_LOCAL_DIR)
+        max_bytes = None if store_configured else EXPORT_SYNC_MAX_BYTES
+        
+        with build_export_file(form_id, sk_from, sk_to, export_spec, max_bytes=max_bytes) as (spool, rows, truncated):
+            size = spool.seek(0, io.SEEK_END)
+            print(f"Export built: rows={rows}, bytes={size}, truncated={truncated}")
+            
+            # Binary bodies grow by 4/3 when base64-encoded
+            inline_size = size * 4 // 3 if export_spec["gzip"] else size
+            if store_configured and inline_size > EXPORT_SYNC_MAX_BYTES:
+                # Too big for a single API Gateway response: hand back a link
+                spool.seek(0)
+                job_result = store_export_file(job, spool, rows)
+                return response(200, job_result)
+            
+            spool.seek(0)
+            data = spool.read()
+        
+        response_headers = {}
+        if truncated:
+            response_headers["X-Row-Cap"] = str(rows)
+        
+        return file_response(200, data, export_spec, job["filename"], headers=response_headers)
+    
+    except ClientError as e:
+        print(f"DynamoDB query failed: {e}")
+        return response(500, {"error": "internal error querying data"})
+    except Exception as e:
+        print(f"Unexpected error in export: {e}")
+        return response(500, {"error": "internal error"})
+
+
+WEBHOOK_SUBMISSION_FIELDS = ["id", "ts", "name", "email", "message", "page", "ip", "ua", "brand_primary_hex"]
+
+
+def webhook_endpoint_key(webhook):
+    """Secret-free endpoint id (matches webhook_dispatcher.endpoint_key)."""
+    identity = f"{webhook.get('type', 'generic')}|{webhook.get('url', '')}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+
+def webhook_message_body(form_id, submission_data, webhooks_config, config_version, endpoint_index=None):
+    """
+    Build one webhook queue message (as a JSON string).
+    
+    "ref" format (WEBHOOK_MESSAGE_FORMAT, the default) carries the submission,
+    form_id and the config version; the dispatcher resolves the endpoints
+    from the config table, so URLs and hmac_secret never enter the queue.
+    A fan-out message names its endpoint by key in only_endpoints.
+    
+    "inline" format is the original one: submission fields at the top level
+    plus the full webhooks array.
+    """
+    submission = {field: submission_data.get(field) for field in WEBHOOK_SUBMISSION_FIELDS}
+    
+    if WEBHOOK_MESSAGE_FORMAT == "ref":
+        message_body = {"form_id": form_id, "config_version": config_version, "submission": submission}
+        if endpoint_index is not None:
+            message_body["only_endpoints"] = [webhook_endpoint_key(webhooks_config[endpoint_index])]
+        return json.dumps(message_body, separators=(",", ":"))
+    
+    message_body = {"form_id": form_id, **submission}
+    if endpoint_index is None:
+        message_body["webhooks"] = webhooks_config
+    else:
+        message_body["webhooks"] = [webhooks_config[endpoint_index]]
+        message_body["endpoint_index"] = endpoint_index
+    return json.dumps(message_body)
+
+
+def enqueue_webhooks(form_id, submission_data, webhooks_config, config_version=0):
+    """
+    Enqueue webhook dispatch job to SQS.
+    
+    Args:
+        form_id: Form identifier
+        submission_data: Form submission data (name, email, message, page, ip, ua, etc)
+        webhooks_config: List of webhook configs [{type, url, hmac_secret?, ...}]
+        config_version: Form config version the webhooks came from
+    
+    Returns:
+        bool: True if enqueued successfully or no webhooks; False if SQS error
+    """
+    if not WEBHOOK_QUEUE_URL:
+        print("WEBHOOK_QUEUE_URL not configured, skipping webhook enqueue")
+        return True  # Not an error - webhooks optional
+    
+    if not webhooks_config or len(webhooks_config) == 0:
+        print(f"No webhooks configured for form_id={form_id}")
+        return True  # Not an error
+    
+    if WEBHOOK_FANOUT and len(webhooks_config) > 1:
+        return enqueue_webhooks_fanout(form_id, submission_data, webhooks_config, config_version)
+    
+    try:
+        # Build SQS message payload (see webhook_message_body)
+        message_body = webhook_message_body(form_id, submission_data, webhooks_config, config_version)
+        
+        # Send to SQS
+        response = sqs.send_message(
+            QueueUrl=WEBHOOK_QUEUE_URL,
+            MessageBody=message_body,
+            MessageAttributes={
+                "form_id": {"StringValue": form_id, "DataType": "String"},
+                "webhook_count": {"StringValue": str(len(webhooks_config)), "DataType": "Number"},
+            }
+        )
+        
+        message_id = response.get("MessageId")
+        print(
+            f"Enqueued webhooks: form_id={form_id}, webhooks={len(webhooks_config)}, "
+            f"format={WEBHOOK_MESSAGE_FORMAT}, bytes={len(message_body)}, message_id={message_id}"
+        )
+        return True
+    
+    except Exception as e:
+        print(f"Warning: Failed to enqueue webhooks for form_id={form_id}: {e}. Continuing without webhook dispatch.")
+        return False  # Log but don't fail the submission
+
+
+def enqueue_webhooks_fanout(form_id, submission_data, webhooks_config, config_version=0):
+    """
+    Enqueue one SQS message per endpoint (WEBHOOK_FANOUT=true).
+    
+    Each message targets a single endpoint, so the dispatcher retries (and
+    backs off) each endpoint on its own and a failing endpoint never
+    redelivers to healthy ones. Messages are sent with SendMessageBatch,
+    10 per call; entries SQS rejects are retried once.
+    
+    Returns:
+        bool: True if every endpoint was enqueued; False otherwise
+    """
+    entries = [
+        {
+            "Id": str(index),
+            "MessageBody": webhook_message_body(form_id, submission_data, webhooks_config, config_version, index),
+            "MessageAttributes": {
+                "form_id": {"StringValue": form_id, "DataType": "String"},
+                "webhook_count": {"StringValue": "1", "DataType": "Number"},
+                "endpoint_index": {"StringValue": str(index), "DataType": "Number"},
+            },
+        }
+        for index in range(len(webhooks_config))
+    ]
+    
+    failed = []
+    for start in range(0, len(entries), 10):
+        chunk = entries[start:start + 10]
+        for attempt in range(2):
+            try:
+                response = sqs.send_message_batch(QueueUrl=WEBHOOK_QUEUE_URL, Entries=chunk)
+            except Exception as e:
+                print(f"Warning: SendMessageBatch failed for form_id={form_id}: {e}")
+                continue
+            failed_ids = {entry["Id"] for entry in response.get("Failed", [])}
+            chunk = [entry for entry in chunk if entry["Id"] in failed_ids]
+            if not chunk:
+                break
+        failed.extend(chunk)
+    
+    if failed:
+        print(
+            f"Warning: Failed to enqueue {len(failed)} of {len(entries)} webhook endpoint(s) "
+            f"for form_id={form_id}. Continuing without them."
+        )
+        return False
+    
+    print(f"Enqueued webhooks (fan-out): form_id={form_id}, messages={len(entries)}, format={WEBHOOK_MESSAGE_FORMAT}")
+    return True
+
+
+def build_submission_item(payload, ip, ua):
+    """
+    Validate one submission payload and build its DynamoDB item.
+    
+    Returns:
+        tuple: (item, None) on success, (None, error_message) if invalid
+    """
+    if not isinstance(payload, dict):
+        return None, "submission must be a JSON object"
+    
     # Extract and validate fields
     form_id = (payload.get("form_id") or "default").strip()
     name = (payload.get("name") or "").strip()
@@ -865,31 +1883,20 @@ def handle_submit(event, context):
     
     # Validate: all core fields required
     if not name:
-        return response(400, {"error": "name required"})
+        return None, "name required"
     if not email:
-        return response(400, {"error": "email required"})
+        return None, "email required"
     if not message:
-        return response(400, {"error": "message required"})
+        return None, "message required"
     
     # Basic email validation
     if "@" not in email or "." not in email.split("@")[-1]:
-        return response(400, {"error": "invalid email format"})
-    
-    # Capture request metadata
-    ip = extract_ip_from_event(event)
-    ua = extract_user_agent(event)
+        return None, "invalid email format"
     
     # Generate submission identifiers
     ts = datetime.utcnow().isoformat() + "Z"
     submission_id = str(uuid.uuid4())
     
-    # TODO: Add analytics fields for future /analytics endpoint
-    # - form_id: track which form instance
-    # - page: track referrer page
-    # - ts: track submission time for analytics queries
-    # - ua: track user agent for browser/device analytics
-    # - ip: track geography/source (consider PII implications)
-    
     # Build DynamoDB item with richer schema
     item = {
         "pk": f"FORM#{form_id}",
@@ -905,108 +1912,512 @@ def handle_submit(event, context):
         "ts": ts,
         "ttl": int(time.time()) + (90 * 86400),  # Auto-delete after 90 days
     }
+    return item, None
+
+
+def build_digest_html(form_id, submissions, brand_name, dashboard_url):
+    """Build a simple HTML digest for several submissions to the same form."""
+    rows = []
+    for submission in submissions:
+        excerpt = submission["message"].replace('\n', ' ').replace('\r', ' ')
+        if len(excerpt) > 240:
+            excerpt = excerpt[:240] + "..."
+        rows.append(
+            '<tr><td style="padding: 8px; border-bottom: 1px solid #e2e8f0;">'
+            f'<strong>{_escape_html(submission["name"])}</strong> &lt;{_escape_html(submission["email"])}&gt;<br>'
+            f'<span style="color: #64748b; font-size: 12px;">{_escape_html(submission["ts"])}</span><br>'
+            f'{_escape_html(excerpt)}</td></tr>'
+        )
     
-    # Persist to DynamoDB
-    try:
-        table.put_item(Item=item)
-        print(f"Stored submission {submission_id} to DynamoDB")
-    except ClientError as e:
-        print(f"DynamoDB put_item failed: {e}")
-        return response(500, {"error": "internal error storing submission"})
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="font-family: Arial, sans-serif; background: #f8f9fa; padding: 20px; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; background: white; border-radius: 8px; padding: 40px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+        <h2 style="color: #1a202c; margin-top: 0;">{len(submissions)} new {_escape_html(brand_name)} submissions on {_escape_html(form_id)}</h2>
+        <table style="width: 100%; border-collapse: collapse;">{''.join(rows)}</table>
+        <p style="margin-top: 24px;">
+            <a href="{_escape_html(dashboard_url)}" style="display: inline-block; padding: 12px 28px; background: #6D28D9; color: white; text-decoration: none; border-radius: 6px; font-weight: bold;">View in Dashboard</a>
+        </p>
+    </div>
+</body>
+</html>"""
+
+
+def build_notification_email(form_id, submissions, form_config):
+    """
+    Build the notification email for one or more stored submissions.
     
-    # Send email notification via SES or MailHog
-    # Get per-form routing config (fallback to global defaults)
-    form_config = get_form_config(form_id)
+    A single submission gets the branded template; several submissions to the
+    same form (from /submit/batch) are summarised in one digest email.
+    
+    Returns:
+        tuple: (subject, body_text, body_html, reply_to)
+    """
     global_config = load_config()
     
-    configured_recipients = form_config.get("recipients", global_config.get("recipients", []))
     subject_prefix = form_config.get("subject_prefix", "")
     configured_brand_hex = form_config.get("brand_primary_hex", global_config.get("brand_primary_hex", "#6D28D9"))
     configured_dashboard_url = form_config.get("dashboard_url", global_config.get("dashboard_url", "https://omdeshpande09012005.github.io/formbridge/"))
     brand_name = global_config.get("brand_name", "FormBridge")
     brand_logo_url = global_config.get("brand_logo_url", "https://omdeshpande09012005.github.io/formbridge/assets/logo.svg")
+    subject_prefix_str = f"{subject_prefix} " if subject_prefix else ""
+    
+    if len(submissions) > 1:
+        email_subject = f"{subject_prefix_str}[{brand_name}] {len(submissions)} new submissions on {form_id}"
+        email_body_text = "\n".join(
+            f"[{s['ts']}] {s['name']} <{s['email']}> ({s['id']}): {s['message']}"
+            for s in submissions
+        ) + "\n"
+        email_body_html = build_digest_html(form_id, submissions, brand_name, configured_dashboard_url)
+        return email_subject, email_body_text, email_body_html, None
+    
+    submission = submissions[0]
+    name = submission["name"]
+    message = submission["message"]
     
     # Build plain-text email (fallback for all clients)
-    subject_prefix_str = f"{subject_prefix} " if subject_prefix else ""
     email_subject = f"{subject_prefix_str}[{brand_name}] New submission on {form_id} — {name}"
     email_body_text = (
         f"Form ID: {form_id}\n"
-        f"Submission ID: {submission_id}\n"
-        f"Timestamp: {ts}\n\n"
+        f"Submission ID: {submission['id']}\n"
+        f"Timestamp: {submission['ts']}\n\n"
         f"From: {name}\n"
-        f"Email: {email}\n"
-        f"Page: {page}\n\n"
+        f"Email: {submission['email']}\n"
+        f"Page: {submission['page']}\n\n"
         f"Message:\n{message}\n"
     )
     
     # Build HTML email using branded template
     email_body_html = ""
-    if configured_recipients and SES_SENDER:
-        try:
-            # Create excerpt (first ~240 chars, no newlines)
-            excerpt = message.replace('\n', ' ').replace('\r', ' ')
-            if len(excerpt) > 240:
-                excerpt = excerpt[:240] + "..."
-            
-            # Build template context (with form-specific branding and routing)
-            template_context = {
-                'form_id': form_id,
-                'name': name,
-                'email': email,
-                'message': message,
-                'excerpt': excerpt,
-                'page': page,
-                'id': submission_id,
-                'ts': ts,
-                'ip': ip,
-                'ua': ua,
-                'dashboard_url': configured_dashboard_url,
-                'brand_name': brand_name,
-                'brand_logo_url': brand_logo_url,
-                'brand_primary_hex': configured_brand_hex,  # Per-form color
-                'subject_prefix': subject_prefix,  # For badge display
+    try:
+        # Create excerpt (first ~240 chars, no newlines)
+        excerpt = message.replace('\n', ' ').replace('\r', ' ')
+        if len(excerpt) > 240:
+            excerpt = excerpt[:240] + "..."
+        
+        # Build template context (with form-specific branding and routing)
+        template_context = {
+            'form_id': form_id,
+            'name': name,
+            'email': submission['email'],
+            'message': message,
+            'excerpt': excerpt,
+            'page': submission['page'],
+            'id': submission['id'],
+            'ts': submission['ts'],
+            'ip': submission['ip'],
+            'ua': submission['ua'],
+            'dashboard_url': configured_dashboard_url,
+            'brand_name': brand_name,
+            'brand_logo_url': brand_logo_url,
+            'brand_primary_hex': configured_brand_hex,  # Per-form color
+            'subject_prefix': subject_prefix,  # For badge display
+        }
+        
+        # Render branded HTML
+        email_body_html = render_email_html(template_context)
+    except Exception as e:
+        print(f"Error rendering branded email template: {e}")
+        # Fall back to basic HTML if rendering fails
+        email_body_html = ""
+    
+    return email_subject, email_body_text, email_body_html, submission["email"]
+
+
+def notification_recipients(form_config):
+    """Recipients for a form's notifications ([] if email isn't configured)."""
+    if not SES_SENDER:
+        return []
+    return form_config.get("recipients", load_config().get("recipients", []))
+
+
+def send_submission_notification(form_id, submissions, form_config):
+    """
+    Email the form's recipients about one or more stored submissions.
+    
+    Returns True if sent, False if sending failed or email isn't configured.
+    """
+    configured_recipients = notification_recipients(form_config)
+    
+    if not configured_recipients:
+        print("Email not configured (missing SES_SENDER or recipients for this form)")
+        return False
+    
+    email_subject, email_body_text, email_body_html, reply_to = build_notification_email(
+        form_id, submissions, form_config
+    )
+    email_sent = send_email(
+        subject=email_subject,
+        body_text=email_body_text,
+        body_html=email_body_html,
+        recipients=configured_recipients,
+        sender=SES_SENDER,
+        reply_to=reply_to
+    )
+    if not email_sent:
+        # Tolerant: log but don't fail the submission since DynamoDB write succeeded
+        print(f"Warning: Email notification failed for {len(submissions)} submission(s) on form_id={form_id}")
+    return email_sent
+
+
+def enqueue_notification(form_id, submissions):
+    """
+    Enqueue a compact notification job for notification_dispatcher.
+    
+    The job carries only the submission fields the email needs; recipients
+    and branding are resolved by the consumer from the form config.
+    
+    Returns True if enqueued, False on SQS error.
+    """
+    try:
+        message_body = {
+            "form_id": form_id,
+            "submissions": [
+                {field: item.get(field, "") for field in NOTIFICATION_FIELDS}
+                for item in submissions
+            ],
+        }
+        response = sqs.send_message(
+            QueueUrl=NOTIFICATION_QUEUE_URL,
+            MessageBody=json.dumps(message_body, separators=(",", ":")),
+            MessageAttributes={
+                "form_id": {"StringValue": form_id, "DataType": "String"},
             }
-            
-            # Render branded HTML
-            email_body_html = render_email_html(template_context)
-        except Exception as e:
-            print(f"Error rendering branded email template: {e}")
-            # Fall back to basic HTML if rendering fails
-            email_body_html = ""
-    
-    # Send email if recipients are configured
-    email_sent = False
-    if configured_recipients and SES_SENDER:
-        email_sent = send_email(
-            subject=email_subject,
-            body_text=email_body_text,
-            body_html=email_body_html,
-            recipients=configured_recipients,
-            sender=SES_SENDER,
-            reply_to=email
         )
-        if not email_sent:
-            # Tolerant: log but don't fail the submission since DynamoDB write succeeded
-            print(f"Warning: Email notification failed for submission {submission_id}")
-    else:
-        print("Email not configured (missing SES_SENDER or recipients for this form)")
+        print(f"Enqueued notification: form_id={form_id}, submissions={len(submissions)}, message_id={response.get('MessageId')}")
+        return True
+    except Exception as e:
+        print(f"Warning: Failed to enqueue notification for form_id={form_id}: {e}")
+        return False
+
+
+def notify_submissions(form_id, submissions, form_config):
+    """
+    Notify about stored submissions, synchronously or via the notification queue.
+    
+    With NOTIFY_MODE=async the email is sent by notification_dispatcher and
+    /submit returns as soon as the submission is durable. If the job can't be
+    enqueued the email is sent inline so it isn't lost.
+    """
+    if NOTIFY_MODE == "async" and NOTIFICATION_QUEUE_URL:
+        if not SES_SENDER:
+            print("Email not configured (missing SES_SENDER), skipping notification enqueue")
+            return False
+        if enqueue_notification(form_id, submissions):
+            return True
+        print("Falling back to synchronous email notification")
+    
+    return send_submission_notification(form_id, submissions, form_config)
+
+
+def webhook_submission_data(item, form_config):
+    """Pick the submission fields forwarded to webhooks."""
+    return {
+        "id": item["id"],
+        "ts": item["ts"],
+        "name": item["name"],
+        "email": item["email"],
+        "message": item["message"],
+        "page": item["page"],
+        "ip": item["ip"],
+        "ua": item["ua"],
+        "brand_primary_hex": form_config.get("brand_primary_hex"),
+    }
+
+
+def _get_submit_executor():
+    """Shared thread pool for submit-path I/O (created once per container)."""
+    global _submit_executor
+    if _submit_executor is None:
+        with _submit_executor_lock:
+            if _submit_executor is None:
+                _submit_executor = ThreadPoolExecutor(
+                    max_workers=max(1, SUBMIT_IO_WORKERS),
+                    thread_name_prefix="submit-io"
+                )
+    return _submit_executor
+
+
+def _timed_stage(timings, name, fn, *args, **kwargs):
+    """
+    Call fn and record its wall-clock duration (ms) in timings[name].
+    
+    Stages that share a name (e.g. one webhook enqueue per batch item)
+    record the slowest call.
+    """
+    started = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        elapsed = round((time.perf_counter() - started) * 1000, 1)
+        timings[name] = max(elapsed, timings.get(name, 0))
+
+
+def start_stage(timings, name, fn, *args, **kwargs):
+    """
+    Start a submit-path stage on the shared pool and return its future.
+    
+    Stages never wait on each other inside the pool: dependencies are
+    resolved on the request thread (future.result()) before the dependent
+    stage is started, so a small pool can't deadlock.
+    """
+    return _get_submit_executor().submit(_timed_stage, timings, name, fn, *args, **kwargs)
+
+
+def wait_stages(stages):
+    """Wait for side-effect stages; failures are logged, never raised."""
+    for name, future in stages.items():
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Warning: submit stage {name} failed: {e}")
+
+
+def handle_submit(event, context):
+    """
+    Handle POST /submit - store contact form submissions.
+    
+    Request body:
+    {
+      "form_id": "default",
+      "name": "John Doe",
+      "email": "john@example.com",
+      "message": "Your message here",
+      "page": "https://example.com/contact"
+    }
+    
+    Returns: {"id": "<submission-id>"}
+    """
+    print("Submit request received")
+    
+    # Verify HMAC if enabled
+    raw_body = event.get("body", "")
+    if isinstance(raw_body, dict):
+        raw_body = json.dumps(raw_body)
+    
+    is_valid, error_msg = verify_hmac_signature(event, raw_body)
+    if not is_valid:
+        return response(401, {"error": error_msg})
+    
+    # Parse request body
+    payload = parse_request_body(event)
+    if payload is None:
+        return response(400, {"error": "Invalid JSON payload"})
+    
+    # Capture request metadata
+    ip = extract_ip_from_event(event)
+    ua = extract_user_agent(event)
+    
+    item, error_msg = build_submission_item(payload, ip, ua)
+    if item is None:
+        return response(400, {"error": error_msg})
+    
+    form_id = item["form_id"]
+    submission_id = item["id"]
+    timings = {}
+    started = time.perf_counter()
+    
+    # Per-form routing config (fallback to global defaults) doesn't depend
+    # on the write, so fetch it while the submission is being stored
+    config_future = start_stage(timings, "config", get_form_config, form_id)
+    
+    # Persist to DynamoDB
+    try:
+        _timed_stage(timings, "put_item", table.put_item, Item=item)
+        print(f"Stored submission {submission_id} to DynamoDB")
+    except ClientError as e:
+        print(f"DynamoDB put_item failed: {e}")
+        return response(500, {"error": "internal error storing submission"})
+    
+    # Update write-time analytics rollup (tolerant: never fails the submission)
+    stages = {"rollup": start_stage(timings, "rollup", record_submission_rollup, form_id, submission_id, item["ts"])}
+    
+    # Email notification and webhook enqueue only need the config, so they
+    # run side by side once it's available
+    form_config = config_future.result()
+    stages["notify"] = start_stage(timings, "notify", notify_submissions, form_id, [item], form_config)
     
-    # Enqueue webhooks if configured for this form
-    # This happens asynchronously via SQS, so doesn't block the response
     webhooks_config = form_config.get("webhooks", [])
     if webhooks_config:
-        submission_data = {
-            "id": submission_id,
-            "ts": ts,
-            "name": name,
-            "email": email,
-            "message": message,
-            "page": page,
-            "ip": ip,
-            "ua": ua,
-            "brand_primary_hex": configured_brand_hex,
-        }
-        enqueue_webhooks(form_id, submission_data, webhooks_config)
+        stages["webhooks"] = start_stage(
+            timings, "webhooks", enqueue_webhooks,
+            form_id, webhook_submission_data(item, form_config), webhooks_config,
+            form_config.get("version", 0)
+        )
+    
+    # Lambda freezes the container after returning, so finish every stage first
+    wait_stages(stages)
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Submit stage timings (ms): {json.dumps(timings, sort_keys=True)}")
     
     # Return success with submission ID
     return response(200, {"id": submission_id})
+
+
+def batch_write_submissions(items):
+    """
+    Write submission items with BatchWriteItem in chunks of 25.
+    
+    Unprocessed items are retried with exponential backoff and jitter.
+    
+    Returns:
+        dict: {sk: error_message} for items that could not be written
+    """
+    failed = {}
+    
+    for start in range(0, len(items), 25):
+        chunk = items[start:start + 25]
+        request_items = {DDB_TABLE: [{"PutRequest": {"Item": item}} for item in chunk]}
+        error = "unprocessed after retries"
+        
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            try:
+                response_obj = dynamodb.batch_write_item(RequestItems=request_items)
+                request_items = response_obj.get("UnprocessedItems") or {}
+            except ClientError as e:
+                error = e.response.get("Error", {}).get("Code", "ClientError")
+                print(f"BatchWriteItem failed (attempt {attempt + 1}): {e}")
+            
+            if not request_items:
+                break
+            if attempt < BATCH_WRITE_MAX_ATTEMPTS - 1:
+                time.sleep(random.uniform(0, 0.05 * (2 ** attempt)))
+        
+        for put_request in (request_items or {}).get(DDB_TABLE, []):
+            failed[put_request["PutRequest"]["Item"]["sk"]] = error
+    
+    return failed
+
+
+def handle_submit_batch(event, context):
+    """
+    Handle POST /submit/batch - store many submissions in one request.
+    
+    Request body:
+    {
+      "form_id": "kiosk-signup",          # optional default for every submission
+      "submissions": [
+        {"name": "...", "email": "...", "message": "...", "page": "..."},
+        ...
+      ]
+    }
+    
+    Submissions are validated individually and written with BatchWriteItem.
+    Each form's config is fetched once, one (digest) email is sent per form,
+    and webhooks are enqueued per stored submission.
+    
+    Response:
+    {
+      "accepted": N,
+      "rejected": M,
+      "results": [{"index": 0, "id": "<uuid>"}, {"index": 1, "error": "email required"}, ...]
+    }
+    """
+    print("Batch submit request received")
+    
+    # Verify HMAC if enabled
+    raw_body = event.get("body", "")
+    if isinstance(raw_body, dict):
+        raw_body = json.dumps(raw_body)
+    
+    is_valid, error_msg = verify_hmac_signature(event, raw_body)
+    if not is_valid:
+        return response(401, {"error": error_msg})
+    
+    # Parse request body
+    payload = parse_request_body(event)
+    if payload is None or not isinstance(payload.get("submissions"), list):
+        return response(400, {"error": "submissions array required"})
+    
+    submissions = payload["submissions"]
+    if not submissions:
+        return response(400, {"error": "submissions array is empty"})
+    if len(submissions) > SUBMIT_BATCH_MAX:
+        return response(400, {"error": f"too many submissions (max {SUBMIT_BATCH_MAX})"})
+    
+    # Capture request metadata (shared by the whole batch)
+    ip = extract_ip_from_event(event)
+    ua = extract_user_agent(event)
+    default_form_id = payload.get("form_id")
+    
+    results = []
+    items = []
+    for index, submission in enumerate(submissions):
+        if isinstance(submission, dict) and default_form_id and not submission.get("form_id"):
+            submission = {**submission, "form_id": default_form_id}
+        
+        item, error_msg = build_submission_item(submission, ip, ua)
+        if item is None:
+            results.append({"index": index, "error": error_msg})
+        else:
+            results.append({"index": index, "id": item["id"]})
+            items.append((index, item))
+    
+    timings = {}
+    started = time.perf_counter()
+    
+    # Fetch each form's config while the batch is being written
+    config_futures = OrderedDict()
+    for _, item in items:
+        form_id = item["form_id"]
+        if form_id not in config_futures:
+            config_futures[form_id] = start_stage(timings, f"config:{form_id}", get_form_config, form_id)
+    
+    # Persist valid submissions
+    failed = _timed_stage(timings, "batch_write", batch_write_submissions, [item for _, item in items])
+    stored = []
+    for index, item in items:
+        if item["sk"] in failed:
+            results[index] = {"index": index, "error": f"internal error storing submission ({failed[item['sk']]})"}
+        else:
+            stored.append(item)
+    
+    print(f"Batch stored {len(stored)}/{len(submissions)} submissions")
+    
+    # Group stored submissions by form for rollups, config, email and webhooks
+    by_form = OrderedDict()
+    for item in stored:
+        by_form.setdefault(item["form_id"], []).append(item)
+    
+    # Every form's side effects are independent, so they all run concurrently
+    stages = {}
+    for form_id, form_items in by_form.items():
+        by_day = OrderedDict()
+        for item in form_items:
+            by_day.setdefault(item["ts"][:10], []).append(item)
+        for day, day_items in by_day.items():
+            latest = day_items[-1]
+            name = f"rollup:{form_id}:{day}"
+            stages[name] = start_stage(
+                timings, name, record_submission_rollup,
+                form_id, latest["id"], latest["ts"], count=len(day_items)
+            )
+    
+    for form_id, form_items in by_form.items():
+        form_config = config_futures[form_id].result()
+        stages[f"notify:{form_id}"] = start_stage(
+            timings, f"notify:{form_id}", notify_submissions, form_id, form_items, form_config
+        )
+        
+        webhooks_config = form_config.get("webhooks", [])
+        if webhooks_config:
+            for item in form_items:
+                stages[f"webhooks:{item['id']}"] = start_stage(
+                    timings, f"webhooks:{form_id}", enqueue_webhooks,
+                    form_id, webhook_submission_data(item, form_config), webhooks_config,
+                    form_config.get("version", 0)
+                )
+    
+    wait_stages(stages)
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Batch submit stage timings (ms): {json.dumps(timings, sort_keys=True)}")
+    
+    return response(200, {
+        "accepted": len(stored),
+        "rejected": len(submissions) - len(stored),
+        "results": results,
+    })
@@ -0,0 +1,92 @@
+import os
+import json
+import logging
+import time
+import random
+from datetime import datetime
+from typing import Dict, Any
+
+from contact_form_lambda import (
+    get_form_config,
+    notification_recipients,
+    send_submission_notification,
+)
+
+# Configure logging
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+logger = logging.getLogger()
+logger.setLevel(LOG_LEVEL)
+
+NOTIFY_SEND_ATTEMPTS = int(os.environ.get("NOTIFY_SEND_ATTEMPTS", "3"))
+NOTIFY_RETRY_BASE_SECS = float(os.environ.get("NOTIFY_RETRY_BASE_SECS", "0.5"))
+
+
+def process_notification_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Render and send the email for one SQS notification job.
+
+    Job body (from contact_form_lambda.enqueue_notification):
+    {
+      "form_id": "contact-us",
+      "submissions": [{"id", "ts", "name", "email", "message", "page", "ip", "ua"}, ...]
+    }
+
+    Sending is retried in-process with jittered backoff; if every attempt
+    fails the record is reported as failed so SQS redelivers it (and moves
+    it to the DLQ after maxReceiveCount).
+    """
+    record_id = record.get("messageId", "unknown")
+
+    try:
+        body = json.loads(record["body"])
+    except (KeyError, json.JSONDecodeError) as e:
+        # Malformed jobs will never succeed; drop them instead of retrying
+        logger.error(f"Failed to parse notification job {record_id}: {str(e)}")
+        return {"record_id": record_id, "success": True, "dropped": True, "error": str(e)}
+
+    form_id = body.get("form_id", "unknown")
+    submissions = body.get("submissions", [])
+
+    if not submissions:
+        logger.info(f"Empty notification job for form_id={form_id}")
+        return {"record_id": record_id, "form_id": form_id, "success": True, "attempts": 0}
+
+    form_config = get_form_config(form_id)
+    if not notification_recipients(form_config):
+        logger.info(f"Email not configured for form_id={form_id}, skipping notification")
+        return {"record_id": record_id, "form_id": form_id, "success": True, "attempts": 0}
+
+    for attempt in range(1, NOTIFY_SEND_ATTEMPTS + 1):
+        if send_submission_notification(form_id, submissions, form_config):
+            logger.info(f"Notification sent: form_id={form_id}, submissions={len(submissions)}, attempt={attempt}")
+            return {"record_id": record_id, "form_id": form_id, "success": True, "attempts": attempt}
+
+        if attempt < NOTIFY_SEND_ATTEMPTS:
+            delay = NOTIFY_RETRY_BASE_SECS * (2 ** (attempt - 1))
+            time.sleep(random.uniform(delay / 2, delay))
+
+    logger.warning(f"Notification failed after {NOTIFY_SEND_ATTEMPTS} attempts: form_id={form_id}, record_id={record_id}")
+    return {"record_id": record_id, "form_id": form_id, "success": False, "attempts": NOTIFY_SEND_ATTEMPTS}
+
+
+def lambda_handler(event, context):
+    """
+    Handle an SQS batch of notification jobs.
+
+    Returns batchItemFailures so only failed jobs go back to the queue
+    (requires ReportBatchItemFailures on the event source mapping).
+    """
+    records = event.get("Records", [])
+    logger.info(f"Received notification batch: {len(records)} messages")
+
+    results = [process_notification_record(record) for record in records]
+    failures = [{"itemIdentifier": r["record_id"]} for r in results if not r.get("success")]
+
+    logger.info(
+        f"Notification batch complete: "
+        f"timestamp={datetime.utcnow().isoformat()}, "
+        f"total={len(results)}, "
+        f"failed={len(failures)}"
+    )
+
+    return {"batchItemFailures": failures}
@@ -1,6 +1,6 @@
 """
 Secrets Loader Module
-Loads configuration from AWS SSM Parameter Store and Secrets Manager with LRU caching.
+Loads configuration from AWS SSM Parameter Store and Secrets Manager with a bounded LRU + TTL cache.
 Falls back to environment variables if SSM/Secrets unavailable (graceful degradation).
 
 Usage:
@@ -8,14 +8,25 @@ Usage:
     config = SecureConfig()
     secret_val = config.get_secret("formbridge/prod/HMAC_SECRET")
     param_val = config.get_param("formbridge/prod/ses/recipients")
+
+Optionally, prefetched values are persisted to a local snapshot file
+(SECRETS_SNAPSHOT_PATH, e.g. /tmp/formbridge-config.json) so the next
+container in the same execution environment, or a restarted local server,
+can serve them immediately and revalidate in the background.
 """
 
 import os
 import json
+import hmac
+import hashlib
 import logging
+import tempfile
 import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from typing import Optional, Dict, Any
-from functools import lru_cache
 from botocore.exceptions import ClientError
 import boto3
 
@@ -23,53 +34,502 @@ logger = logging.getLogger(__name__)
 
 # Configuration
 CACHE_TTL_SECONDS = 600  # 10 minutes
+CACHE_STALE_SECONDS = 3600  # Serve expired values this much longer while refreshing in the background
+NEGATIVE_CACHE_TTL_SECONDS = 60  # Remember "not found" results (no SSM/Secrets value, no fallback)
+CACHE_TTL_JITTER = 0.1  # +/-10% so containers don't all expire the same key at once
+CACHE_MAX_ENTRIES = 512  # Least recently used entries are evicted beyond this
 TIMEOUT_SECONDS = 2  # Timeout for SSM/Secrets calls
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 
+# Optional on-disk snapshot of prefetched config (disabled unless a path is set)
+SNAPSHOT_PATH = os.environ.get("SECRETS_SNAPSHOT_PATH", "")
+SNAPSHOT_TTL_SECONDS = int(os.environ.get("SECRETS_SNAPSHOT_TTL_SECONDS", "3600"))
+SNAPSHOT_INCLUDE_SECRETS = os.environ.get("SECRETS_SNAPSHOT_INCLUDE_SECRETS", "false").lower() == "true"
+SNAPSHOT_KEY = os.environ.get("SECRETS_SNAPSHOT_KEY", "")  # HMAC key; without it only corruption is detected
+SNAPSHOT_FORMAT_VERSION = 1
+
 logger.setLevel(LOG_LEVEL)
 
 
+class CacheStore:
+    """
+    Thread-safe, size-bounded LRU store of (value, expires_at, stale_until) entries.
+    
+    Expiry policy lives in SecureConfig; the store only keeps entries in
+    recency order, evicts the least recently used one past max_size, drops
+    entries on invalidation and counts what happens to them.
+    """
+    
+    def __init__(self, max_size: int = CACHE_MAX_ENTRIES):
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[str, tuple[Any, float, float, float]]" = OrderedDict()  # {key: (value, expires_at, stale_until, stored_at)}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+    
+    def get(self, key: str) -> Optional[tuple]:
+        """Return (value, expires_at, stale_until) and mark the key recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[:3]
+    
+    def peek(self, key: str) -> Optional[tuple]:
+        """Return (value, expires_at, stale_until) without touching recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[:3] if entry is not None else None
+    
+    def set(self, key: str, value: Any, expires_at: float, stale_until: float) -> None:
+        """Insert or replace an entry, evicting least recently used ones past max_size."""
+        with self._lock:
+            self._entries[key] = (value, expires_at, stale_until, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+                logger.debug(f"Evicted {evicted}")
+    
+    def invalidate(self, key: Optional[str] = None, prefix: Optional[str] = None) -> int:
+        """Drop one key, every key with a prefix, or (no arguments) everything. Returns count dropped."""
+        with self._lock:
+            if key is None and prefix is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                doomed = [
+                    k for k in self._entries
+                    if k == key or (prefix is not None and k.startswith(prefix))
+                ]
+                for k in doomed:
+                    del self._entries[k]
+                dropped = len(doomed)
+            self._stats["invalidations"] += dropped
+        return dropped
+    
+    def entries(self) -> list:
+        """List of (key, value, expires_at, stale_until) for every entry."""
+        with self._lock:
+            return [(key, *entry[:3]) for key, entry in self._entries.items()]
+    
+    def incr(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of counters, size and entry ages (seconds)."""
+        now = time.time()
+        with self._lock:
+            snapshot = dict(self._stats)
+            ages = [now - entry[3] for entry in self._entries.values()]
+            snapshot["size"] = len(self._entries)
+        snapshot["max_size"] = self.max_size
+        snapshot["oldest_age_secs"] = round(max(ages), 1) if ages else 0
+        snapshot["newest_age_secs"] = round(min(ages), 1) if ages else 0
+        return snapshot
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
 class SecureConfig:
     """
     Manages secure configuration loading with caching and fallbacks.
     
     Priority order:
-    1. In-memory cache (if not expired)
+    1. In-memory cache (if not expired; recently expired values are served
+       stale while a background refresh runs)
     2. AWS SSM Parameter Store (for parameters)
     3. AWS Secrets Manager (for secrets)
     4. Environment variables (fallback)
+    
+    Lookups that find nothing anywhere are cached for NEGATIVE_CACHE_TTL_SECONDS.
     """
     
     def __init__(self):
         """Initialize SSM and Secrets Manager clients."""
         self.ssm_client = boto3.client("ssm", region_name=os.environ.get("AWS_REGION"))
         self.secrets_client = boto3.client("secretsmanager", region_name=os.environ.get("AWS_REGION"))
-        self._cache: Dict[str, tuple[Any, float]] = {}  # {key: (value, timestamp)}
-        self.cache_version = 0
+        self._cache = CacheStore(CACHE_MAX_ENTRIES)
+        self._prefetched_paths: Dict[str, float] = {}  # {path: timestamp} of complete path prefetches
+        self._refreshing: set = set()  # keys with a background refresh in flight
+        self._sensitive_keys: set = set()  # decrypted SecureString parameters
+        self._snapshot_paths: set = set()  # prefetch paths restored from the snapshot
+        self._snapshot_info: Dict[str, Any] = {"restored": 0, "saved": 0}
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()  # one writer at a time, so the newest write has the most entries
+        self.snapshot_path = SNAPSHOT_PATH
+        if self.snapshot_path:
+            self.load_snapshot()
+    
+    def _jittered(self, ttl: float) -> float:
+        """Spread a TTL by +/-CACHE_TTL_JITTER."""
+        return ttl * random.uniform(1 - CACHE_TTL_JITTER, 1 + CACHE_TTL_JITTER)
+    
+    def _set_cache(self, cache_key: str, value: Any, stale_until: Optional[float] = None) -> None:
+        """
+        Store a value (or None for "not found") with a jittered expiry.
+        
+        Found values stay servable as stale for CACHE_STALE_SECONDS after they
+        expire; "not found" entries use the shorter negative TTL and are never
+        served stale. Passing stale_until re-stores a value whose refresh
+        failed: it is retried after the negative TTL and keeps its original
+        stale window, so it can't be served stale forever.
+        """
+        now = time.time()
+        if value is None:
+            expires_at = now + self._jittered(NEGATIVE_CACHE_TTL_SECONDS)
+            stale_until = expires_at
+        elif stale_until is not None:
+            expires_at = min(now + self._jittered(NEGATIVE_CACHE_TTL_SECONDS), stale_until)
+        else:
+            expires_at = now + self._jittered(CACHE_TTL_SECONDS)
+            stale_until = expires_at + CACHE_STALE_SECONDS
+        self._cache.set(cache_key, value, expires_at, stale_until)
+        logger.debug(f"Cached {cache_key}")
+    
+    def _count(self, stat: str) -> None:
+        self._cache.incr(stat)
+    
+    def _get_cached(self, cache_key: str, loader, *args) -> Optional[Any]:
+        """
+        Return a cached value, loading it with loader(*args) on a miss.
+        
+        - Fresh entry: returned as is (including cached "not found" -> None)
+        - Expired but within the stale window: returned immediately while a
+          single background refresh reloads it
+        - Missing or too old: loaded synchronously and cached
+        """
+        now = time.time()
+        entry = self._cache.get(cache_key)
+        
+        if entry is not None:
+            value, expires_at, stale_until = entry
+            if now < expires_at:
+                self._count("hits" if value is not None else "negative_hits")
+                logger.debug(f"Cache hit for {cache_key}")
+                return value
+            if value is not None and now < stale_until:
+                self._count("stale_hits")
+                logger.debug(f"Serving stale {cache_key} while refreshing")
+                self._refresh_in_background(cache_key, stale_until, loader, *args)
+                return value
+        
+        self._count("misses")
+        value = loader(*args)
+        self._set_cache(cache_key, value)
+        return value
+    
+    def _refresh_in_background(self, cache_key: str, stale_until: float, loader, *args) -> None:
+        """Reload one key on a daemon thread (at most one refresh per key at a time)."""
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+        
+        def refresh():
+            try:
+                value = loader(*args)
+                if value is None:
+                    # Keep serving the old value until its stale window ends
+                    self._count("refresh_failures")
+                    entry = self._cache.peek(cache_key)
+                    if entry is not None and entry[0] is not None:
+                        self._set_cache(cache_key, entry[0], stale_until=stale_until)
+                else:
+                    self._count("refreshes")
+                    self._set_cache(cache_key, value)
+            except Exception as e:
+                self._count("refresh_failures")
+                logger.warning(f"Background refresh failed for {cache_key}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(cache_key)
+        
+        threading.Thread(target=refresh, name=f"refresh:{cache_key}", daemon=True).start()
     
-    def _is_cache_valid(self, cache_key: str) -> bool:
-        """Check if cache entry exists and is not expired."""
-        if cache_key not in self._cache:
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of cache counters, size, entry ages and in-flight refreshes."""
+        stats = self._cache.stats()
+        with self._lock:
+            stats["refreshing"] = len(self._refreshing)
+            stats["prefetched_paths"] = len(self._prefetched_paths)
+            stats["snapshot_restored"] = self._snapshot_info["restored"]
+            stats["snapshot_saved"] = self._snapshot_info["saved"]
+        return stats
+    
+    def _reload(self, cache_key: str, loader, *args) -> Optional[Any]:
+        """Load a key now, bypassing the cache; a failed load keeps any cached value."""
+        value = loader(*args)
+        if value is not None or self._cache.peek(cache_key) is None:
+            self._set_cache(cache_key, value)
+        return value
+    
+    def _snapshot_digest(self, body: str) -> str:
+        """HMAC-SHA256 of the snapshot body (plain SHA-256 without SNAPSHOT_KEY)."""
+        if SNAPSHOT_KEY:
+            return hmac.new(SNAPSHOT_KEY.encode("utf-8"), body.encode("utf-8"), hashlib.sha256).hexdigest()
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+    
+    def save_snapshot(self) -> bool:
+        """
+        Write cached values to the snapshot file (atomically, mode 0600).
+        
+        Parameters are always included; secrets and decrypted SecureString
+        parameters only with SECRETS_SNAPSHOT_INCLUDE_SECRETS=true. "Not
+        found" entries are left out.
+        
+        Returns:
+            True if written, False if disabled or the write failed
+        """
+        if not self.snapshot_path:
             return False
         
-        cached_value, timestamp = self._cache[cache_key]
-        if time.time() - timestamp > CACHE_TTL_SECONDS:
-            del self._cache[cache_key]
+        with self._snapshot_lock:
+            return self._write_snapshot()
+    
+    def _write_snapshot(self) -> bool:
+        """Serialize, sign and atomically replace the snapshot file (caller holds _snapshot_lock)."""
+        now = time.time()
+        with self._lock:
+            sensitive = set(self._sensitive_keys)
+            paths = list(self._prefetched_paths)
+        entries = {}
+        for key, value, _, _ in self._cache.entries():
+            if value is None:
+                continue
+            if (key.startswith("secret:") or key in sensitive) and not SNAPSHOT_INCLUDE_SECRETS:
+                continue
+            entries[key] = value
+        
+        body = json.dumps({
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "written_at": now,
+            "expires_at": now + SNAPSHOT_TTL_SECONDS,
+            "paths": paths,
+            "entries": entries,
+        }, sort_keys=True, separators=(",", ":"))
+        
+        try:
+            directory = os.path.dirname(self.snapshot_path) or "."
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"body": body, "digest": self._snapshot_digest(body)}, f)
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, self.snapshot_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"Failed to write config snapshot {self.snapshot_path}: {str(e)}")
             return False
         
+        with self._lock:
+            self._snapshot_info["saved"] += 1
+        logger.info(f"Saved config snapshot with {len(entries)} entries to {self.snapshot_path}")
         return True
     
-    def _get_from_cache(self, cache_key: str) -> Optional[Any]:
-        """Retrieve value from cache if valid."""
-        if self._is_cache_valid(cache_key):
-            logger.debug(f"Cache hit for {cache_key}")
-            return self._cache[cache_key][0]
-        return None
+    def load_snapshot(self) -> int:
+        """
+        Restore entries from the snapshot file if it is intact and unexpired.
+        
+        Restored values are already expired (but servable as stale until the
+        snapshot's own expiry), so the first lookup returns them immediately
+        and triggers a background refresh.
+        
+        Returns:
+            Number of entries restored
+        """
+        try:
+            with open(self.snapshot_path) as f:
+                wrapper = json.load(f)
+            body = wrapper["body"]
+            if not hmac.compare_digest(wrapper["digest"], self._snapshot_digest(body)):
+                logger.warning(f"Config snapshot {self.snapshot_path} failed its integrity check; ignoring it")
+                return 0
+            snapshot = json.loads(body)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"Failed to read config snapshot {self.snapshot_path}: {str(e)}")
+            return 0
+        
+        now = time.time()
+        if snapshot.get("format") != SNAPSHOT_FORMAT_VERSION or snapshot.get("expires_at", 0) <= now:
+            logger.info(f"Config snapshot {self.snapshot_path} is expired or outdated; ignoring it")
+            return 0
+        
+        restored = 0
+        for key, value in snapshot.get("entries", {}).items():
+            if key.startswith("secret:") and not SNAPSHOT_INCLUDE_SECRETS:
+                continue
+            self._cache.set(key, value, now, snapshot["expires_at"])
+            restored += 1
+        
+        with self._lock:
+            for path in snapshot.get("paths", []):
+                self._prefetched_paths[path] = snapshot["written_at"]
+                self._snapshot_paths.add(path)
+            self._snapshot_info["restored"] = restored
+        
+        age = round(now - snapshot["written_at"], 1)
+        logger.info(f"Restored {restored} entries from config snapshot {self.snapshot_path} (age {age}s)")
+        return restored
     
-    def _set_cache(self, cache_key: str, value: Any) -> None:
-        """Store value in cache with current timestamp."""
-        self._cache[cache_key] = (value, time.time())
-        logger.debug(f"Cached {cache_key}")
+    def _covered_by_prefetch(self, name: str) -> bool:
+        """True if name lies under a path whose complete listing is still cached."""
+        now = time.time()
+        with self._lock:
+            return any(
+                name.startswith(path) and now - timestamp <= CACHE_TTL_SECONDS
+                for path, timestamp in self._prefetched_paths.items()
+            )
+    
+    def prefetch(
+        self,
+        path: str,
+        decrypt: bool = False,
+        secrets: Optional[Dict[str, Optional[str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Load every parameter under an SSM path in bulk and fetch secrets concurrently.
+        
+        Parameters come from paginated GetParametersByPath calls (10 per page)
+        instead of one GetParameter per name; secrets are fetched on worker
+        threads at the same time. Everything lands in the normal cache, so
+        later get_param/get_secret calls are cache hits. Once a path has been
+        listed completely, names under it that SSM doesn't have go straight to
+        their env fallback instead of costing another SSM round trip.
+        
+        Args:
+            path: SSM path prefix (e.g., /formbridge/prod/)
+            decrypt: Whether to decrypt SecureString parameters
+            secrets: {secret_name: fallback_env} to fetch alongside the parameters
+        
+        Returns:
+            {"params": count, "secrets": count, "elapsed_ms": float, "complete": bool}
+        """
+        if not path.endswith("/"):
+            path = f"{path}/"
+        secrets = secrets or {}
+        
+        with self._lock:
+            from_snapshot = path in self._snapshot_paths
+            self._snapshot_paths.discard(path)
+        
+        if from_snapshot:
+            # Serve the restored values now; one bulk reload replaces them.
+            # Marking the keys as refreshing stops per-key refreshes meanwhile.
+            # Secrets that weren't snapshotted are loaded synchronously below.
+            cached = {key for key, *_ in self._cache.entries()}
+            param_keys = [key for key in cached if key.startswith(f"param:{path}")]
+            restored_secrets = {
+                name: fallback_env for name, fallback_env in secrets.items()
+                if f"secret:{name}" in cached
+            }
+            keys = param_keys + [f"secret:{name}" for name in restored_secrets]
+            with self._lock:
+                self._refreshing.update(keys)
+            threading.Thread(
+                target=self._prefetch_now,
+                args=(path, decrypt, restored_secrets, keys),
+                name=f"prefetch:{path}",
+                daemon=True
+            ).start()
+            logger.info(f"Using config snapshot for {path}; revalidating in the background")
+            
+            missing_secrets = [name for name in secrets if name not in restored_secrets]
+            secrets_loaded = sum(
+                1 for name in missing_secrets
+                if self._reload(f"secret:{name}", self._load_secret, name, secrets[name]) is not None
+            )
+            if secrets_loaded and SNAPSHOT_INCLUDE_SECRETS:
+                self.save_snapshot()
+            
+            return {
+                "params": len(param_keys),
+                "secrets": len(restored_secrets) + secrets_loaded,
+                "elapsed_ms": 0.0,
+                "complete": True,
+                "snapshot": True,
+            }
+        
+        return self._prefetch_now(path, decrypt, secrets)
+    
+    def _prefetch_now(
+        self,
+        path: str,
+        decrypt: bool,
+        secrets: Dict[str, Optional[str]],
+        release_keys: Optional[list] = None
+    ) -> Dict[str, Any]:
+        """Run the bulk load for prefetch() and refresh the snapshot file."""
+        started = time.perf_counter()
+        loaded = 0
+        complete = False
+        skipped_secure = False
+        
+        with ThreadPoolExecutor(max_workers=max(1, len(secrets))) as executor:
+            secret_futures = [
+                executor.submit(self._reload, f"secret:{name}", self._load_secret, name, fallback_env)
+                for name, fallback_env in secrets.items()
+            ]
+            
+            try:
+                logger.debug(f"Prefetching parameters under {path} from SSM")
+                request = {"Path": path, "Recursive": True, "WithDecryption": decrypt}
+                while True:
+                    response = self.ssm_client.get_parameters_by_path(**request)
+                    for parameter in response.get("Parameters", []):
+                        if parameter.get("Type") == "SecureString":
+                            if not decrypt:
+                                # Leave encrypted values to get_param(decrypt=True)
+                                skipped_secure = True
+                                continue
+                            with self._lock:
+                                self._sensitive_keys.add(f"param:{parameter['Name']}")
+                        self._set_cache(f"param:{parameter['Name']}", parameter["Value"])
+                        loaded += 1
+                    next_token = response.get("NextToken")
+                    if not next_token:
+                        break
+                    request["NextToken"] = next_token
+                complete = not skipped_secure
+                if complete:
+                    with self._lock:
+                        self._prefetched_paths[path] = time.time()
+            except ClientError as e:
+                error_code = e.response.get("Error", {}).get("Code", "Unknown")
+                logger.warning(f"SSM get_parameters_by_path failed for {path}: {error_code}. Falling back to per-parameter loads.")
+            except Exception as e:
+                logger.warning(f"SSM get_parameters_by_path error for {path}: {str(e)}. Falling back to per-parameter loads.")
+            
+            secrets_loaded = sum(1 for future in secret_futures if future.result() is not None)
+        
+        if release_keys:
+            with self._lock:
+                self._refreshing.difference_update(release_keys)
+        
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            f"Prefetched {loaded} parameter(s) under {path} and "
+            f"{secrets_loaded}/{len(secrets)} secret(s) in {elapsed_ms} ms"
+        )
+        if complete:
+            self.save_snapshot()
+        return {"params": loaded, "secrets": secrets_loaded, "elapsed_ms": elapsed_ms, "complete": complete}
     
     def get_param(
         self,
@@ -88,35 +548,37 @@ class SecureConfig:
         Returns:
             Parameter value or None if not found
         """
-        cache_key = f"param:{name}:v{self.cache_version}"
-        
-        # Check cache first
-        cached = self._get_from_cache(cache_key)
-        if cached is not None:
-            return cached
-        
-        # Try SSM Parameter Store
-        try:
-            logger.debug(f"Fetching parameter {name} from SSM")
-            response = self.ssm_client.get_parameter(
-                Name=name,
-                WithDecryption=decrypt
-            )
-            value = response["Parameter"]["Value"]
-            self._set_cache(cache_key, value)
-            logger.info(f"Successfully loaded {name} from SSM")
-            return value
-        except ClientError as e:
-            error_code = e.response.get("Error", {}).get("Code", "Unknown")
-            logger.warning(f"SSM get_parameter failed for {name}: {error_code}. Using fallback.")
-        except Exception as e:
-            logger.warning(f"SSM get_parameter error for {name}: {str(e)}. Using fallback.")
+        cache_key = f"param:{name}"
+        if decrypt:
+            with self._lock:
+                self._sensitive_keys.add(cache_key)
+        return self._get_cached(cache_key, self._load_param, name, decrypt, fallback_env)
+    
+    def _load_param(self, name: str, decrypt: bool, fallback_env: Optional[str]) -> Optional[str]:
+        """Fetch a parameter from SSM, falling back to the env var (no caching)."""
+        # Try SSM Parameter Store (unless a complete bulk prefetch showed it's absent)
+        if self._covered_by_prefetch(name):
+            logger.debug(f"{name} not found in prefetched path, skipping SSM")
+        else:
+            try:
+                logger.debug(f"Fetching parameter {name} from SSM")
+                response = self.ssm_client.get_parameter(
+                    Name=name,
+                    WithDecryption=decrypt
+                )
+                value = response["Parameter"]["Value"]
+                logger.info(f"Successfully loaded {name} from SSM")
+                return value
+            except ClientError as e:
+                error_code = e.response.get("Error", {}).get("Code", "Unknown")
+                logger.warning(f"SSM get_parameter failed for {name}: {error_code}. Using fallback.")
+            except Exception as e:
+                logger.warning(f"SSM get_parameter error for {name}: {str(e)}. Using fallback.")
         
         # Fallback to environment variable
         if fallback_env:
             env_value = os.environ.get(fallback_env)
             if env_value:
-                self._set_cache(cache_key, env_value)
                 logger.info(f"Using fallback env var {fallback_env} for {name}")
                 return env_value
         
@@ -138,13 +600,11 @@ class SecureConfig:
         Returns:
             Secret value or None if not found
         """
-        cache_key = f"secret:{name}:v{self.cache_version}"
-        
-        # Check cache first
-        cached = self._get_from_cache(cache_key)
-        if cached is not None:
-            return cached
-        
+        cache_key = f"secret:{name}"
+        return self._get_cached(cache_key, self._load_secret, name, fallback_env)
+    
+    def _load_secret(self, name: str, fallback_env: Optional[str]) -> Optional[Any]:
+        """Fetch a secret from Secrets Manager, falling back to the env var (no caching)."""
         # Try Secrets Manager
         try:
             logger.debug(f"Fetching secret {name} from Secrets Manager")
@@ -156,11 +616,9 @@ class SecureConfig:
                 # Try to parse as JSON, but if not valid JSON, return as string
                 try:
                     parsed = json.loads(value)
-                    self._set_cache(cache_key, parsed)
                     logger.info(f"Successfully loaded {name} from Secrets Manager (JSON)")
                     return parsed
                 except json.JSONDecodeError:
-                    self._set_cache(cache_key, value)
                     logger.info(f"Successfully loaded {name} from Secrets Manager (string)")
                     return value
             else:
@@ -175,17 +633,49 @@ class SecureConfig:
         if fallback_env:
             env_value = os.environ.get(fallback_env)
             if env_value:
-                self._set_cache(cache_key, env_value)
                 logger.info(f"Using fallback env var {fallback_env} for {name}")
                 return env_value
         
         logger.warning(f"No value found for {name} (Secrets Manager failed, no fallback)")
         return None
     
-    def invalidate_cache(self) -> None:
-        """Invalidate all cached values by incrementing version."""
-        self.cache_version += 1
-        logger.info(f"Cache invalidated. New version: {self.cache_version}")
+    def invalidate_cache(self, name: Optional[str] = None, prefix: Optional[str] = None) -> int:
+        """
+        Drop cached values so the next lookup reloads them.
+        
+        Args:
+            name: Invalidate one parameter/secret name
+            prefix: Invalidate every parameter/secret name starting with prefix
+                    (e.g., /formbridge/prod/brand/)
+            (neither): Invalidate everything
+        
+        Returns:
+            Number of cache entries dropped
+        """
+        if name is None and prefix is None:
+            dropped = self._cache.invalidate()
+            with self._lock:
+                self._prefetched_paths.clear()
+                self._snapshot_paths.clear()
+            logger.info(f"Cache invalidated ({dropped} entries dropped)")
+            return dropped
+        
+        target = name if name is not None else prefix
+        dropped = 0
+        for kind in ("param", "secret"):
+            if name is not None:
+                dropped += self._cache.invalidate(key=f"{kind}:{name}")
+            else:
+                dropped += self._cache.invalidate(prefix=f"{kind}:{prefix}")
+        
+        # A path listing that covers the target is no longer complete
+        with self._lock:
+            for path in list(self._prefetched_paths):
+                if target.startswith(path) or (prefix is not None and path.startswith(prefix)):
+                    del self._prefetched_paths[path]
+        
+        logger.info(f"Cache invalidated for {'name' if name is not None else 'prefix'} {target} ({dropped} entries dropped)")
+        return dropped
 
 
 # Global instance for Lambda to use
@@ -218,6 +708,20 @@ def get_secret(
     return get_config().get_secret(name, fallback_env)
 
 
-def invalidate_cache() -> None:
-    """Convenience function to invalidate cache."""
-    return get_config().invalidate_cache()
+def prefetch(
+    path: str,
+    decrypt: bool = False,
+    secrets: Optional[Dict[str, Optional[str]]] = None
+) -> Dict[str, Any]:
+    """Convenience function to bulk-prefetch config into the global instance."""
+    return get_config().prefetch(path, decrypt, secrets)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Convenience function to read cache counters from the global config instance."""
+    return get_config().get_stats()
+
+
+def invalidate_cache(name: Optional[str] = None, prefix: Optional[str] = None) -> int:
+    """Convenience function to invalidate cache (all, one name, or a prefix)."""
+    return get_config().invalidate_cache(name, prefix)
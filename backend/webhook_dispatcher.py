@@ -5,10 +5,20 @@ import time
 import hashlib
 import hmac
 import base64
+import gzip
 import urllib.parse
+import email.utils
+import math
+import random
+import threading
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional, Tuple
+import boto3
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from botocore.exceptions import ClientError
 
 # Configure logging
@@ -18,6 +28,103 @@ logger.setLevel(LOG_LEVEL)
 
 WEBHOOK_TIMEOUT = int(os.environ.get("WEBHOOK_TIMEOUT", "10"))
 
+# Adaptive per-host timeouts: derived from each host's observed latency
+# (p99 x multiplier), clamped to these bounds; WEBHOOK_TIMEOUT is the ceiling
+# and the default until a host has enough samples
+WEBHOOK_TIMEOUT_MIN = float(os.environ.get("WEBHOOK_TIMEOUT_MIN", "1.0"))
+WEBHOOK_CONNECT_TIMEOUT_MIN = float(os.environ.get("WEBHOOK_CONNECT_TIMEOUT_MIN", "0.5"))
+WEBHOOK_CONNECT_TIMEOUT_MAX = float(os.environ.get("WEBHOOK_CONNECT_TIMEOUT_MAX", "3.05"))
+WEBHOOK_TIMEOUT_MULTIPLIER = float(os.environ.get("WEBHOOK_TIMEOUT_MULTIPLIER", "3"))
+WEBHOOK_TIMEOUT_PERCENTILE = float(os.environ.get("WEBHOOK_TIMEOUT_PERCENTILE", "99"))
+WEBHOOK_LATENCY_MIN_SAMPLES = int(os.environ.get("WEBHOOK_LATENCY_MIN_SAMPLES", "20"))
+WEBHOOK_LATENCY_MAX_SAMPLES = int(os.environ.get("WEBHOOK_LATENCY_MAX_SAMPLES", "1000"))  # Counts halve past this
+
+# Concurrency limits for dispatching a batch (across all records in it)
+WEBHOOK_MAX_IN_FLIGHT = int(os.environ.get("WEBHOOK_MAX_IN_FLIGHT", "16"))
+WEBHOOK_MAX_PER_HOST = int(os.environ.get("WEBHOOK_MAX_PER_HOST", "4"))
+
+# Keep-alive session pool (one requests.Session per scheme+host, reused while warm)
+WEBHOOK_POOL_MAXSIZE = int(os.environ.get("WEBHOOK_POOL_MAXSIZE", str(WEBHOOK_MAX_PER_HOST)))
+WEBHOOK_CONNECT_RETRIES = int(os.environ.get("WEBHOOK_CONNECT_RETRIES", "2"))  # Connect failures only; POSTs aren't replayed
+WEBHOOK_SESSION_IDLE_SECS = int(os.environ.get("WEBHOOK_SESSION_IDLE_SECS", "300"))  # Drop sessions unused this long
+
+# Per-endpoint delivery state, so a redelivered message skips endpoints that
+# already acknowledged it (optional; without a table every endpoint is retried)
+WEBHOOK_DELIVERY_TABLE = os.environ.get("WEBHOOK_DELIVERY_TABLE", "")
+WEBHOOK_DELIVERY_TTL_DAYS = int(os.environ.get("WEBHOOK_DELIVERY_TTL_DAYS", "7"))
+_delivery_table = None
+
+# Idempotent delivery, keyed by (submission id, endpoint key):
+# "local" remembers deliveries in-process only, "table" also claims each
+# delivery with a conditional write to WEBHOOK_DELIVERY_TABLE, "off" disables
+WEBHOOK_IDEMPOTENCY = os.environ.get("WEBHOOK_IDEMPOTENCY", "local").lower()
+WEBHOOK_DEDUP_LOCAL_SECS = int(os.environ.get("WEBHOOK_DEDUP_LOCAL_SECS", "900"))
+WEBHOOK_DEDUP_LOCAL_MAX = int(os.environ.get("WEBHOOK_DEDUP_LOCAL_MAX", "10000"))
+# A pending claim holds for the claiming invocation's remaining time plus
+# this margin (the default lease when there's no Lambda context). Keep
+# function timeout + margin below the queue's VisibilityTimeout, so a claim
+# left by a crashed or timed-out invocation has expired by its redelivery.
+WEBHOOK_IDEMPOTENCY_LEASE_SECS = int(os.environ.get("WEBHOOK_IDEMPOTENCY_LEASE_SECS", "35"))
+WEBHOOK_IDEMPOTENCY_LEASE_MARGIN_SECS = int(os.environ.get("WEBHOOK_IDEMPOTENCY_LEASE_MARGIN_SECS", "5"))
+
+# Per-host circuit breaker: after enough failures a host is skipped (deliveries
+# deferred to SQS redelivery) until a cool-down passes and a probe succeeds
+WEBHOOK_BREAKER_WINDOW = int(os.environ.get("WEBHOOK_BREAKER_WINDOW", "10"))  # Recent calls considered
+WEBHOOK_BREAKER_MIN_CALLS = int(os.environ.get("WEBHOOK_BREAKER_MIN_CALLS", "3"))
+WEBHOOK_BREAKER_FAILURE_RATE = float(os.environ.get("WEBHOOK_BREAKER_FAILURE_RATE", "0.5"))
+WEBHOOK_BREAKER_COOLDOWN_SECS = int(os.environ.get("WEBHOOK_BREAKER_COOLDOWN_SECS", "60"))
+WEBHOOK_BREAKER_HALF_OPEN_PROBES = int(os.environ.get("WEBHOOK_BREAKER_HALF_OPEN_PROBES", "1"))
+WEBHOOK_BREAKER_SHARED = os.environ.get("WEBHOOK_BREAKER_SHARED", "false").lower() == "true"  # Share open state via WEBHOOK_DELIVERY_TABLE
+
+# Per-destination token buckets (requests/sec and burst; 0 = no client-side
+# limit). Retry-After and X-RateLimit-* headers are honored for every type.
+# A per-webhook "rate_per_sec" / "burst" in the form config overrides these.
+WEBHOOK_RATE_LIMITS = {
+    "slack": (
+        float(os.environ.get("WEBHOOK_SLACK_RATE_PER_SEC", "1")),
+        int(os.environ.get("WEBHOOK_SLACK_BURST", "3")),
+    ),
+    "discord": (
+        float(os.environ.get("WEBHOOK_DISCORD_RATE_PER_SEC", "2.5")),
+        int(os.environ.get("WEBHOOK_DISCORD_BURST", "5")),
+    ),
+    "generic": (
+        float(os.environ.get("WEBHOOK_GENERIC_RATE_PER_SEC", "0")),
+        int(os.environ.get("WEBHOOK_GENERIC_BURST", "10")),
+    ),
+}
+WEBHOOK_RATE_MAX_WAIT_SECS = float(os.environ.get("WEBHOOK_RATE_MAX_WAIT_SECS", "1.0"))  # Wait in-process up to this, else reschedule
+WEBHOOK_RATE_DEFAULT_RETRY_SECS = float(os.environ.get("WEBHOOK_RATE_DEFAULT_RETRY_SECS", "5"))  # 429 without Retry-After
+WEBHOOK_RATE_MAX_RESCHEDULES = int(os.environ.get("WEBHOOK_RATE_MAX_RESCHEDULES", "10"))  # Then back to SQS redelivery (and the DLQ)
+WEBHOOK_QUEUE_URL = os.environ.get("WEBHOOK_QUEUE_URL", "")  # For rescheduling (else derived from eventSourceARN)
+SQS_MAX_DELAY_SECONDS = 900
+
+# Backoff for messages going back to the queue: instead of the queue's fixed
+# visibility timeout, each one becomes visible again after an exponential,
+# jittered delay based on its receive count (0 disables)
+WEBHOOK_RETRY_BASE_SECS = int(os.environ.get("WEBHOOK_RETRY_BASE_SECS", "15"))
+WEBHOOK_RETRY_MAX_SECS = int(os.environ.get("WEBHOOK_RETRY_MAX_SECS", "900"))
+_sqs_client = None
+
+# Reference messages ({"form_id", "config_version", "submission"}) are
+# resolved against the form config table through a warm per-container cache
+FORM_CONFIG_TABLE = os.environ.get("FORM_CONFIG_TABLE", "formbridge-config")
+WEBHOOK_CONFIG_CACHE_TTL = int(os.environ.get("WEBHOOK_CONFIG_CACHE_TTL", "300"))
+WEBHOOK_CONFIG_CACHE_SIZE = int(os.environ.get("WEBHOOK_CONFIG_CACHE_SIZE", "256"))
+_config_table = None
+_webhook_config_cache: "OrderedDict[str, Tuple[List[Dict[str, Any]], int, float]]" = OrderedDict()  # {form_id: (webhooks, version, expires_at)}
+_webhook_config_lock = threading.Lock()
+
+# Micro-batching for generic webhooks with "batch" set: submissions for the
+# same endpoint in one SQS batch go out as one JSON-array POST within these caps
+WEBHOOK_BATCH_MAX_ITEMS = int(os.environ.get("WEBHOOK_BATCH_MAX_ITEMS", "100"))
+WEBHOOK_BATCH_MAX_BYTES = int(os.environ.get("WEBHOOK_BATCH_MAX_BYTES", str(256 * 1024)))
+
+# Payload pipeline: bodies are serialized once per record, and generic
+# webhooks with "gzip" set get compressed bodies
+WEBHOOK_GZIP_MIN_BYTES = int(os.environ.get("WEBHOOK_GZIP_MIN_BYTES", "1024"))
+WEBHOOK_GZIP_LEVEL = int(os.environ.get("WEBHOOK_GZIP_LEVEL", "6"))
+
 
 def compute_hmac_signature(secret: str, payload: bytes) -> str:
     """
@@ -37,6 +144,11 @@ def compute_hmac_signature(secret: str, payload: bytes) -> str:
     ).hexdigest()
 
 
+def gzip_payload(payload: bytes) -> bytes:
+    """gzip-compress a body (mtime=0, so the same body always compresses to the same bytes)."""
+    return gzip.compress(payload, compresslevel=WEBHOOK_GZIP_LEVEL, mtime=0)
+
+
 def sanitize_url_for_logging(url: str) -> str:
     """Extract hostname from webhook URL for logging (no secrets)."""
     try:
@@ -46,11 +158,803 @@ def sanitize_url_for_logging(url: str) -> str:
         return url[:20]
 
 
-def dispatch_slack_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dict[str, Any]:
+def endpoint_host(url: str) -> str:
+    """Host key (host[:port], no credentials) used for per-host concurrency limits."""
+    try:
+        parsed = urllib.parse.urlparse(url)
+        host = (parsed.hostname or "").lower()
+        return f"{host}:{parsed.port}" if parsed.port else host or url[:20]
+    except Exception:
+        return url[:20]
+
+
+class LatencyHistogram:
+    """
+    Compact HDR-style latency histogram.
+    
+    Buckets grow geometrically (each ~10% wider than the last) from 1 ms to
+    WEBHOOK_TIMEOUT, so about 100 integer counters cover the whole range
+    with ~5% relative error. When the total passes max_samples every count
+    is halved, so old samples fade and the percentiles follow the host's
+    recent behaviour.
+    """
+    
+    GROWTH = 1.1
+    MIN_MS = 1.0
+    
+    def __init__(self, max_ms: float, max_samples: int = WEBHOOK_LATENCY_MAX_SAMPLES):
+        self.max_samples = max(2, max_samples)
+        self._log_growth = math.log(self.GROWTH)
+        self.counts = [0] * (self._bucket(max_ms) + 1)
+        self.total = 0
+    
+    def _bucket(self, ms: float) -> int:
+        if ms <= self.MIN_MS:
+            return 0
+        return int(math.log(ms / self.MIN_MS) / self._log_growth) + 1
+    
+    def _upper_ms(self, bucket: int) -> float:
+        return self.MIN_MS * (self.GROWTH ** bucket)
+    
+    def record(self, ms: float) -> None:
+        self.counts[min(self._bucket(ms), len(self.counts) - 1)] += 1
+        self.total += 1
+        if self.total > self.max_samples:
+            self.counts = [count // 2 for count in self.counts]
+            self.total = sum(self.counts)
+    
+    def percentile(self, p: float) -> float:
+        """Upper bound (ms) of the bucket holding the p-th percentile (0 if empty)."""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(self.total * p / 100)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._upper_ms(bucket)
+        return self._upper_ms(len(self.counts) - 1)
+
+
+class LatencyTracker:
+    """
+    Per-host latency histograms and the timeouts derived from them.
+    
+    read timeout    = clamp(p99 x multiplier, WEBHOOK_TIMEOUT_MIN, WEBHOOK_TIMEOUT)
+    connect timeout = clamp(p99 x multiplier, WEBHOOK_CONNECT_TIMEOUT_MIN, WEBHOOK_CONNECT_TIMEOUT_MAX)
+    
+    (a connect never takes longer than the whole request, so the request's
+    own latency bounds it too). Hosts with fewer than
+    WEBHOOK_LATENCY_MIN_SAMPLES samples use the static defaults.
+    """
+    
+    def __init__(self):
+        self._hosts: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, host: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._hosts.get(host)
+            if histogram is None:
+                histogram = LatencyHistogram(WEBHOOK_TIMEOUT * 1000)
+                self._hosts[host] = histogram
+            histogram.record(seconds * 1000)
+    
+    def timeouts(self, host: str) -> Tuple[float, float]:
+        """(connect_timeout, read_timeout) in seconds for a host."""
+        default_connect = min(WEBHOOK_CONNECT_TIMEOUT_MAX, WEBHOOK_TIMEOUT)
+        with self._lock:
+            histogram = self._hosts.get(host)
+            if histogram is None or histogram.total < WEBHOOK_LATENCY_MIN_SAMPLES:
+                return default_connect, float(WEBHOOK_TIMEOUT)
+            budget = histogram.percentile(WEBHOOK_TIMEOUT_PERCENTILE) / 1000 * WEBHOOK_TIMEOUT_MULTIPLIER
+        
+        read_timeout = min(max(budget, WEBHOOK_TIMEOUT_MIN), WEBHOOK_TIMEOUT)
+        connect_timeout = min(max(budget, WEBHOOK_CONNECT_TIMEOUT_MIN), default_connect)
+        return round(connect_timeout, 3), round(read_timeout, 3)
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host sample count, p50/p90/p99 (ms) and current timeouts."""
+        with self._lock:
+            hosts = list(self._hosts)
+        stats = {}
+        for host in hosts:
+            with self._lock:
+                histogram = self._hosts[host]
+                summary = {
+                    "samples": histogram.total,
+                    "p50_ms": round(histogram.percentile(50), 1),
+                    "p90_ms": round(histogram.percentile(90), 1),
+                    "p99_ms": round(histogram.percentile(99), 1),
+                }
+            summary["connect_timeout"], summary["read_timeout"] = self.timeouts(host)
+            stats[host] = summary
+        return stats
+    
+    def log_stats(self) -> None:
+        for host, summary in self.stats().items():
+            logger.info(
+                f"Webhook latency: host={host}, samples={summary['samples']}, "
+                f"p50={summary['p50_ms']}ms, p90={summary['p90_ms']}ms, p99={summary['p99_ms']}ms, "
+                f"timeouts=({summary['connect_timeout']}s connect, {summary['read_timeout']}s read)"
+            )
+
+
+_latency = LatencyTracker()
+
+
+def post_webhook(webhook_url: str, **kwargs) -> requests.Response:
+    """
+    POST through the host's pooled session with adaptive timeouts.
+    
+    The request's duration feeds the host's latency histogram. A timeout is
+    recorded too (as the time waited), so a slow but healthy host's
+    timeouts grow back toward WEBHOOK_TIMEOUT. On timeout the exception
+    carries timeout_secs for logging.
+    """
+    host = endpoint_host(webhook_url)
+    connect_timeout, read_timeout = _latency.timeouts(host)
+    started = time.perf_counter()
+    try:
+        response = get_session(webhook_url).post(webhook_url, timeout=(connect_timeout, read_timeout), **kwargs)
+    except requests.Timeout as e:
+        _latency.record(host, time.perf_counter() - started)
+        e.timeout_secs = connect_timeout if isinstance(e, requests.ConnectTimeout) else read_timeout
+        raise
+    _latency.record(host, time.perf_counter() - started)
+    _rate_limiter.observe(webhook_url, response)
+    return response
+
+
+class SessionPool:
+    """
+    Keep-alive requests.Session per scheme+host, shared by all dispatch threads.
+    
+    Each session mounts an HTTPAdapter whose connection pool holds up to
+    WEBHOOK_POOL_MAXSIZE connections (matching the per-host concurrency
+    limit) and retries only failed connects. Sessions idle for longer than
+    WEBHOOK_SESSION_IDLE_SECS are closed, since the far end has usually
+    dropped the connections by then.
     """
-    Dispatch to Slack webhook.
     
-    Sends:
+    def __init__(
+        self,
+        pool_maxsize: int = WEBHOOK_POOL_MAXSIZE,
+        connect_retries: int = WEBHOOK_CONNECT_RETRIES,
+        idle_secs: int = WEBHOOK_SESSION_IDLE_SECS
+    ):
+        self.pool_maxsize = max(1, pool_maxsize)
+        self.connect_retries = max(0, connect_retries)
+        self.idle_secs = idle_secs
+        self._sessions: Dict[str, Tuple[requests.Session, float]] = {}  # {key: (session, last_used)}
+        self._lock = threading.Lock()
+    
+    def _new_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.connect_retries,
+            connect=self.connect_retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=0.1,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    
+    def get(self, url: str) -> requests.Session:
+        """Return the pooled session for url's scheme and host, creating it if needed."""
+        parsed = urllib.parse.urlparse(url)
+        key = f"{parsed.scheme}://{endpoint_host(url)}"
+        now = time.time()
+        
+        with self._lock:
+            session, last_used = self._sessions.get(key, (None, 0.0))
+            if session is not None and now - last_used > self.idle_secs:
+                session.close()
+                session = None
+            if session is None:
+                session = self._new_session()
+                logger.debug(f"Created webhook session for {key}")
+            self._sessions[key] = (session, now)
+            return session
+    
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Connection reuse per session: {key: {"connections": n, "requests": m}}.
+        
+        connections counts TCP/TLS connections opened, requests counts
+        requests sent over them; requests - connections were served on
+        reused keep-alive connections.
+        """
+        with self._lock:
+            sessions = list(self._sessions.items())
+        
+        stats = {}
+        for key, (session, _) in sessions:
+            connections = requests_sent = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for pool_key in list(pools.keys()):
+                    pool = pools.get(pool_key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        requests_sent += pool.num_requests
+            stats[key] = {"connections": connections, "requests": requests_sent}
+        return stats
+    
+    def log_stats(self) -> None:
+        """Log connection reuse for every pooled session."""
+        for key, counts in self.stats().items():
+            requests_sent = counts["requests"]
+            reused = max(0, requests_sent - counts["connections"])
+            reuse_pct = round(100 * reused / requests_sent, 1) if requests_sent else 0.0
+            logger.info(
+                f"Webhook connection reuse: host={key}, "
+                f"connections={counts['connections']}, requests={requests_sent}, reused_pct={reuse_pct}"
+            )
+    
+    def close(self) -> None:
+        with self._lock:
+            sessions = [session for session, _ in self._sessions.values()]
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+_sessions = SessionPool()
+
+
+def get_session(url: str) -> requests.Session:
+    """Pooled keep-alive session for a webhook URL."""
+    return _sessions.get(url)
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit per destination host.
+    
+    - closed: calls go through; the last WEBHOOK_BREAKER_WINDOW outcomes are
+      kept, and once there are WEBHOOK_BREAKER_MIN_CALLS of them with a
+      failure rate >= WEBHOOK_BREAKER_FAILURE_RATE the circuit opens
+    - open: calls are refused immediately until the cool-down passes
+    - half-open: up to WEBHOOK_BREAKER_HALF_OPEN_PROBES calls are let through;
+      a success closes the circuit, a failure reopens it
+    
+    State lives at module level, so it survives warm invocations. With
+    WEBHOOK_BREAKER_SHARED, opening a circuit also writes a small item
+    (pk=BREAKER#<host>, sk=STATE) that other containers read at the start
+    of each batch.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        window: int = WEBHOOK_BREAKER_WINDOW,
+        min_calls: int = WEBHOOK_BREAKER_MIN_CALLS,
+        failure_rate: float = WEBHOOK_BREAKER_FAILURE_RATE,
+        cooldown_secs: int = WEBHOOK_BREAKER_COOLDOWN_SECS,
+        half_open_probes: int = WEBHOOK_BREAKER_HALF_OPEN_PROBES,
+        shared: bool = WEBHOOK_BREAKER_SHARED
+    ):
+        self.window = max(1, window)
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.cooldown_secs = cooldown_secs
+        self.half_open_probes = max(1, half_open_probes)
+        self.shared = shared
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def _host(self, host: str) -> Dict[str, Any]:
+        circuit = self._hosts.get(host)
+        if circuit is None:
+            circuit = {
+                "state": self.CLOSED,
+                "outcomes": deque(maxlen=self.window),
+                "open_until": 0.0,
+                "probes": 0,
+            }
+            self._hosts[host] = circuit
+        return circuit
+    
+    def state(self, host: str) -> str:
+        with self._lock:
+            return self._host(host)["state"]
+    
+    def allow(self, host: str) -> bool:
+        """True if a call to host may go ahead now (counts half-open probes)."""
+        with self._lock:
+            circuit = self._host(host)
+            if circuit["state"] == self.OPEN:
+                if time.time() < circuit["open_until"]:
+                    return False
+                circuit["state"] = self.HALF_OPEN
+                circuit["probes"] = 0
+                logger.info(f"Circuit half-open: url_host={host}")
+            if circuit["state"] == self.HALF_OPEN:
+                if circuit["probes"] >= self.half_open_probes:
+                    return False
+                circuit["probes"] += 1
+            return True
+    
+    def record(self, host: str, success: bool) -> None:
+        """Record the outcome of an allowed call."""
+        opened_until = None
+        closed = False
+        with self._lock:
+            circuit = self._host(host)
+            if circuit["state"] == self.HALF_OPEN:
+                circuit["probes"] = max(0, circuit["probes"] - 1)
+                if success:
+                    circuit["state"] = self.CLOSED
+                    circuit["outcomes"].clear()
+                    closed = True
+                else:
+                    opened_until = self._open(circuit)
+            elif circuit["state"] == self.CLOSED:
+                circuit["outcomes"].append(success)
+                outcomes = circuit["outcomes"]
+                failures = sum(1 for ok in outcomes if not ok)
+                if len(outcomes) >= self.min_calls and failures / len(outcomes) >= self.failure_rate:
+                    opened_until = self._open(circuit)
+        
+        if opened_until is not None:
+            logger.warning(f"Circuit opened: url_host={host}, cooldown={self.cooldown_secs}s")
+            self._write_shared(host, opened_until)
+        elif closed:
+            logger.info(f"Circuit closed: url_host={host}")
+            self._write_shared(host, 0)
+    
+    def _open(self, circuit: Dict[str, Any]) -> float:
+        circuit["state"] = self.OPEN
+        circuit["open_until"] = time.time() + self.cooldown_secs
+        circuit["outcomes"].clear()
+        return circuit["open_until"]
+    
+    def _write_shared(self, host: str, open_until: float) -> None:
+        table = get_delivery_table() if self.shared else None
+        if table is None:
+            return
+        try:
+            table.put_item(Item={
+                "pk": f"BREAKER#{host}",
+                "sk": "STATE",
+                "open_until": int(open_until),
+                "ttl": int(max(open_until, time.time())) + 86400,
+            })
+        except Exception as e:
+            logger.warning(f"Failed to share circuit state for {host}: {str(e)}")
+    
+    def sync_shared(self, hosts: List[str]) -> None:
+        """Adopt circuits that other containers opened (one BatchGetItem per 100 hosts)."""
+        table = get_delivery_table() if self.shared else None
+        if table is None or not hosts:
+            return
+        
+        hosts = sorted(set(hosts))
+        now = time.time()
+        for start in range(0, len(hosts), 100):
+            keys = [{"pk": f"BREAKER#{host}", "sk": "STATE"} for host in hosts[start:start + 100]]
+            try:
+                response = table.meta.client.batch_get_item(
+                    RequestItems={table.name: {"Keys": keys, "ProjectionExpression": "pk, open_until"}}
+                )
+                items = response.get("Responses", {}).get(table.name, [])
+            except Exception as e:
+                logger.warning(f"Failed to read shared circuit state: {str(e)}")
+                return
+            
+            # The low-level client returns typed attribute values
+            for item in items:
+                host = item["pk"]["S"][len("BREAKER#"):]
+                open_until = float(item.get("open_until", {}).get("N", "0"))
+                if open_until <= now:
+                    continue
+                with self._lock:
+                    circuit = self._host(host)
+                    if circuit["state"] != self.OPEN or circuit["open_until"] < open_until:
+                        circuit["state"] = self.OPEN
+                        circuit["open_until"] = open_until
+                        circuit["outcomes"].clear()
+                        logger.info(f"Circuit open (shared): url_host={host}")
+
+
+_breaker = CircuitBreaker()
+
+
+def breaker_failure(result: Dict[str, Any]) -> bool:
+    """True if a result says the host itself is unhealthy (no response, or 5xx)."""
+    if result.get("success"):
+        return False
+    status_code = result.get("status_code")
+    return not status_code or status_code >= 500
+
+
+def guarded_call(host: str, call: Callable[[], Dict[str, Any]], breaker: Optional[CircuitBreaker] = None) -> Dict[str, Any]:
+    """Run a dispatch call through the host's circuit breaker."""
+    breaker = breaker or _breaker
+    if not breaker.allow(host):
+        logger.info(f"Circuit open, deferring delivery: url_host={host}")
+        return {"success": False, "deferred": True, "error": "Circuit open"}
+    
+    result = call()
+    breaker.record(host, not breaker_failure(result))
+    return result
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limit_reset(headers) -> Optional[float]:
+    """
+    Seconds until an exhausted X-RateLimit window resets, or None.
+    
+    Understands X-RateLimit-Reset-After (Discord, seconds) and
+    X-RateLimit-Reset as either an epoch timestamp or a delta.
+    """
+    reset_after = headers.get("X-RateLimit-Reset-After")
+    if reset_after:
+        try:
+            return max(0.0, float(reset_after))
+        except ValueError:
+            pass
+    reset = headers.get("X-RateLimit-Reset")
+    if reset:
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+
+def rate_key(url: str) -> str:
+    """Secret-free key for one destination URL (Slack and Discord limit per webhook, not per host)."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+
+
+class RateLimiter:
+    """
+    Token bucket per destination URL, plus server-imposed blocks.
+    
+    acquire() takes a token, waiting in-process for up to
+    WEBHOOK_RATE_MAX_WAIT_SECS; if the next token (or the end of a
+    Retry-After / X-RateLimit block) is further away it returns the delay
+    instead, and the delivery is rescheduled rather than sent into a 429.
+    observe() reads the headers of every response. Sent / deferred / 429
+    counts are kept per host for the batch log.
+    """
+    
+    def __init__(self, max_wait_secs: float = WEBHOOK_RATE_MAX_WAIT_SECS):
+        self.max_wait_secs = max_wait_secs
+        self._buckets: Dict[str, Dict[str, float]] = {}
+        self._counts: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+    
+    def _bucket(self, key: str) -> Dict[str, float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = {"tokens": None, "updated": time.time(), "blocked_until": 0.0}
+            self._buckets[key] = bucket
+        return bucket
+    
+    def _reserve(self, key: str, rate: float, burst: int) -> float:
+        """Take a token and return 0, or return the seconds until one is available."""
+        now = time.time()
+        with self._lock:
+            bucket = self._bucket(key)
+            if bucket["blocked_until"] > now:
+                return bucket["blocked_until"] - now
+            if rate <= 0:
+                return 0.0
+            burst = max(1, burst)
+            if bucket["tokens"] is None:
+                bucket["tokens"] = float(burst)
+            bucket["tokens"] = min(float(burst), bucket["tokens"] + (now - bucket["updated"]) * rate)
+            bucket["updated"] = now
+            if bucket["tokens"] >= 1:
+                bucket["tokens"] -= 1
+                return 0.0
+            return (1 - bucket["tokens"]) / rate
+    
+    def acquire(self, url: str, rate: float, burst: int) -> float:
+        """0 once a token was taken, else the seconds to reschedule by."""
+        key = rate_key(url)
+        deadline = time.time() + self.max_wait_secs
+        while True:
+            wait_secs = self._reserve(key, rate, burst)
+            if wait_secs <= 0:
+                return 0.0
+            if time.time() + wait_secs > deadline:
+                return wait_secs
+            time.sleep(wait_secs)
+    
+    def observe(self, url: str, response: requests.Response) -> None:
+        """Apply Retry-After (on 429/503) and exhausted X-RateLimit windows."""
+        block_secs = None
+        if response.status_code in (429, 503):
+            block_secs = parse_retry_after(response.headers.get("Retry-After"))
+            if block_secs is None and response.status_code == 429:
+                block_secs = parse_rate_limit_reset(response.headers) or WEBHOOK_RATE_DEFAULT_RETRY_SECS
+        if block_secs is None and response.headers.get("X-RateLimit-Remaining") == "0":
+            block_secs = parse_rate_limit_reset(response.headers)
+        if not block_secs:
+            return
+        
+        with self._lock:
+            bucket = self._bucket(rate_key(url))
+            bucket["blocked_until"] = max(bucket["blocked_until"], time.time() + block_secs)
+        logger.info(f"Rate limit block: url_host={sanitize_url_for_logging(url)}, seconds={round(block_secs, 2)}")
+    
+    def blocked_for(self, url: str) -> float:
+        with self._lock:
+            bucket = self._bucket(rate_key(url))
+            return max(0.0, bucket["blocked_until"] - time.time())
+    
+    def count(self, host: str, outcome: str) -> None:
+        with self._lock:
+            self._counts.setdefault(host, Counter())[outcome] += 1
+    
+    def log_stats(self) -> None:
+        """Log and reset per-host sent / deferred / 429 counts."""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        for host, outcomes in counts.items():
+            logger.info(
+                f"Webhook rate limiting: host={host}, sent={outcomes['sent']}, "
+                f"deferred={outcomes['deferred']}, throttled_429={outcomes['throttled']}"
+            )
+
+
+_rate_limiter = RateLimiter()
+
+
+def rate_limits(webhook_config: Dict[str, Any]) -> Tuple[float, int]:
+    """(requests/sec, burst) for a webhook: per-webhook config, else the type's default."""
+    default_rate, default_burst = WEBHOOK_RATE_LIMITS.get(
+        webhook_config.get("type", "generic"), WEBHOOK_RATE_LIMITS["generic"]
+    )
+    try:
+        return (
+            float(webhook_config.get("rate_per_sec", default_rate)),
+            int(webhook_config.get("burst", default_burst)),
+        )
+    except (TypeError, ValueError):
+        return default_rate, default_burst
+
+
+def throttled_call(
+    webhook_config: Dict[str, Any],
+    host: str,
+    call: Callable[[], Dict[str, Any]],
+    limiter: Optional[RateLimiter] = None
+) -> Dict[str, Any]:
+    """
+    Run a dispatch call within its destination's rate limit.
+    
+    Deliveries that can't be sent soon, and 429 responses, come back as
+    {"deferred": True, "rate_limited": True, "retry_after": secs} so they
+    can be rescheduled instead of counted as failures.
+    """
+    limiter = limiter or _rate_limiter
+    webhook_url = webhook_config.get("url", "")
+    rate, burst = rate_limits(webhook_config)
+    
+    wait_secs = limiter.acquire(webhook_url, rate, burst)
+    if wait_secs > 0:
+        limiter.count(host, "deferred")
+        logger.info(f"Rate limited, deferring delivery: url_host={host}, retry_after={round(wait_secs, 2)}s")
+        return {"success": False, "deferred": True, "rate_limited": True, "retry_after": round(wait_secs, 2), "error": "Rate limited"}
+    
+    result = call()
+    if result.get("status_code") == 429:
+        limiter.count(host, "throttled")
+        retry_after = limiter.blocked_for(webhook_url) or WEBHOOK_RATE_DEFAULT_RETRY_SECS
+        return {**result, "deferred": True, "rate_limited": True, "retry_after": round(retry_after, 2)}
+    if not result.get("deferred"):
+        limiter.count(host, "sent")
+    return result
+
+
+def get_sqs_client():
+    global _sqs_client
+    if _sqs_client is None:
+        _sqs_client = boto3.client("sqs")
+    return _sqs_client
+
+
+def source_queue_url(record: Dict[str, Any]) -> str:
+    """WEBHOOK_QUEUE_URL, else the URL of the queue a record came from."""
+    if WEBHOOK_QUEUE_URL:
+        return WEBHOOK_QUEUE_URL
+    # arn:aws:sqs:<region>:<account>:<queue-name>
+    parts = record.get("eventSourceARN", "").split(":")
+    if len(parts) != 6:
+        return ""
+    return f"https://sqs.{parts[3]}.amazonaws.com/{parts[4]}/{parts[5]}"
+
+
+def reschedule_endpoints(record: Dict[str, Any], keys: List[str], delay_secs: float) -> bool:
+    """
+    Re-enqueue a message for just the given endpoints after delay_secs.
+    
+    The copy is the original message body (reference messages stay
+    references) plus only_endpoints, so endpoints that already got the
+    submission aren't sent it again, and a reschedules counter. A new
+    message starts its receive count over, so after
+    WEBHOOK_RATE_MAX_RESCHEDULES copies this gives up and the message is
+    retried in place, where maxReceiveCount and the DLQ still apply.
+    Returns False (and the caller falls back to SQS redelivery) if the
+    cap is reached or the message can't be sent.
+    """
+    queue_url = source_queue_url(record)
+    if not queue_url:
+        return False
+    
+    body = json.loads(record["body"])
+    reschedules = int(body.get("reschedules", 0))
+    if reschedules >= WEBHOOK_RATE_MAX_RESCHEDULES:
+        logger.warning(f"Rate-limited delivery rescheduled {reschedules} times; retrying via SQS redelivery")
+        return False
+    
+    delay = min(SQS_MAX_DELAY_SECONDS, max(1, math.ceil(delay_secs)))
+    try:
+        get_sqs_client().send_message(
+            QueueUrl=queue_url,
+            MessageBody=json.dumps({**body, "only_endpoints": keys, "reschedules": reschedules + 1}, separators=(",", ":")),
+            DelaySeconds=delay
+        )
+    except Exception as e:
+        logger.warning(f"Failed to reschedule rate-limited delivery: {str(e)}")
+        return False
+    
+    logger.info(f"Rescheduled rate-limited delivery: endpoints={len(keys)}, delay={delay}s")
+    return True
+
+
+def retry_delay_secs(receive_count: int) -> int:
+    """Exponential backoff with jitter for the n-th receive (in [delay/2, delay])."""
+    delay = min(WEBHOOK_RETRY_MAX_SECS, WEBHOOK_RETRY_BASE_SECS * (2 ** max(0, receive_count - 1)))
+    return int(random.uniform(delay / 2, delay))
+
+
+def back_off_retries(records: List[Dict[str, Any]], retry_ids: List[str]) -> None:
+    """
+    Delay the redelivery of retried messages with ChangeMessageVisibility.
+    
+    Each message gets its own delay from its ApproximateReceiveCount, so an
+    endpoint that keeps failing is retried less and less often while the
+    receive count (and with it the DLQ redrive) keeps counting. Errors are
+    logged; the queue's visibility timeout then applies as before.
+    """
+    if WEBHOOK_RETRY_BASE_SECS <= 0 or not retry_ids:
+        return
+    
+    by_id = {record.get("messageId"): record for record in records}
+    by_queue: Dict[str, List[Dict[str, Any]]] = {}
+    for message_id in retry_ids:
+        record = by_id.get(message_id)
+        if not record or not record.get("receiptHandle"):
+            continue
+        queue_url = source_queue_url(record)
+        if not queue_url:
+            continue
+        receive_count = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+        entries = by_queue.setdefault(queue_url, [])
+        entries.append({
+            "Id": str(len(entries)),
+            "ReceiptHandle": record["receiptHandle"],
+            "VisibilityTimeout": retry_delay_secs(receive_count),
+        })
+    
+    for queue_url, entries in by_queue.items():
+        for start in range(0, len(entries), 10):
+            chunk = entries[start:start + 10]
+            try:
+                response = get_sqs_client().change_message_visibility_batch(QueueUrl=queue_url, Entries=chunk)
+                if response.get("Failed"):
+                    logger.warning(f"Failed to set retry backoff for {len(response['Failed'])} message(s)")
+            except Exception as e:
+                logger.warning(f"Failed to set retry backoff: {str(e)}")
+                continue
+            logger.info(
+                f"Retry backoff set: messages={len(chunk)}, "
+                f"delays={[entry['VisibilityTimeout'] for entry in chunk]}"
+            )
+
+
+class DispatchEngine:
+    """
+    Runs webhook calls concurrently under a global and a per-host in-flight limit.
+    
+    Jobs are (host, callable) pairs. Jobs are started in submission order
+    whenever both limits allow, so a slow host only holds up its own jobs,
+    and results come back in submission order regardless of completion order.
+    Worker threads are shared across invocations of a warm container.
+    """
+    
+    def __init__(self, max_in_flight: int = WEBHOOK_MAX_IN_FLIGHT, max_per_host: int = WEBHOOK_MAX_PER_HOST):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_per_host = max(1, max_per_host)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_in_flight,
+                    thread_name_prefix="webhook"
+                )
+            return self._executor
+    
+    def run(self, jobs: List[Tuple[str, Callable[[], Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """
+        Run every job and return their results in job order.
+        
+        A job that raises gets {"success": False, "error": "..."} as its result.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        if not jobs:
+            return []
+        
+        executor = self._get_executor()
+        pending: "OrderedDict[str, deque]" = OrderedDict()
+        for index, (host, _) in enumerate(jobs):
+            pending.setdefault(host, deque()).append(index)
+        
+        in_flight = {}
+        host_in_flight: Counter = Counter()
+        
+        while pending or in_flight:
+            # Start whatever the limits allow, one host at a time in arrival order
+            for host in list(pending):
+                queue = pending[host]
+                while queue and len(in_flight) < self.max_in_flight and host_in_flight[host] < self.max_per_host:
+                    index = queue.popleft()
+                    in_flight[executor.submit(jobs[index][1])] = (index, host)
+                    host_in_flight[host] += 1
+                if not queue:
+                    del pending[host]
+            
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                index, host = in_flight.pop(future)
+                host_in_flight[host] -= 1
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    logger.error(f"Webhook job raised: url_host={host}, error={str(e)}")
+                    results[index] = {"success": False, "error": str(e)}
+        
+        return results
+
+
+_engine = DispatchEngine()
+
+
+def slack_payload(form_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Slack message for a submission.
+    
     {
       "text": "[FormBridge] <form_id> — <name>: <excerpt>"
     }
@@ -62,17 +966,28 @@ def dispatch_slack_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dict[
     # Excerpt: first 100 chars of message
     excerpt = message[:100] + ("..." if len(message) > 100 else "")
     
-    payload = {
+    return {
         "text": f"[FormBridge] {form_id} — {name}: {excerpt}"
     }
+
+
+def dispatch_slack_webhook(webhook_url: str, form_data: Dict[str, Any], payload_bytes: Optional[bytes] = None) -> Dict[str, Any]:
+    """
+    Dispatch to Slack webhook (payload from slack_payload).
     
-    logger.info(f"Dispatching Slack webhook: form_id={form_id}, text_len={len(payload['text'])}")
+    payload_bytes is the already-serialized payload (RecordPayloads.slack());
+    it is built here if not given.
+    """
+    form_id = form_data.get("form_id", "unknown")
+    if payload_bytes is None:
+        payload_bytes = json.dumps(slack_payload(form_data)).encode("utf-8")
+    
+    logger.info(f"Dispatching Slack webhook: form_id={form_id}, payload_size={len(payload_bytes)}")
     
     try:
-        response = requests.post(
+        response = post_webhook(
             webhook_url,
-            json=payload,
-            timeout=WEBHOOK_TIMEOUT,
+            data=payload_bytes,
             headers={"Content-Type": "application/json"}
         )
         
@@ -94,12 +1009,13 @@ def dispatch_slack_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dict[
                 "type": "slack"
             }
     
-    except requests.Timeout:
+    except requests.Timeout as e:
         url_host = sanitize_url_for_logging(webhook_url)
-        logger.warning(f"Slack dispatch timeout: url_host={url_host}, timeout={WEBHOOK_TIMEOUT}s")
+        timeout_secs = getattr(e, "timeout_secs", WEBHOOK_TIMEOUT)
+        logger.warning(f"Slack dispatch timeout: url_host={url_host}, timeout={timeout_secs}s")
         return {
             "success": False,
-            "error": f"Timeout after {WEBHOOK_TIMEOUT}s",
+            "error": f"Timeout after {timeout_secs}s",
             "type": "slack"
         }
     
@@ -113,11 +1029,10 @@ def dispatch_slack_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dict[
         }
 
 
-def dispatch_discord_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dict[str, Any]:
+def discord_payload(form_data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Dispatch to Discord webhook.
+    Discord message for a submission.
     
-    Sends:
     {
       "username": "FormBridge",
       "embeds": [
@@ -146,7 +1061,7 @@ def dispatch_discord_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dic
     except (ValueError, AttributeError):
         color_decimal = 953833  # default blue
     
-    payload = {
+    return {
         "username": "FormBridge",
         "embeds": [
             {
@@ -163,14 +1078,25 @@ def dispatch_discord_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dic
             }
         ]
     }
+
+
+def dispatch_discord_webhook(webhook_url: str, form_data: Dict[str, Any], payload_bytes: Optional[bytes] = None) -> Dict[str, Any]:
+    """
+    Dispatch to Discord webhook (payload from discord_payload).
     
-    logger.info(f"Dispatching Discord webhook: form_id={form_id}")
+    payload_bytes is the already-serialized payload (RecordPayloads.discord());
+    it is built here if not given.
+    """
+    form_id = form_data.get("form_id", "unknown")
+    if payload_bytes is None:
+        payload_bytes = json.dumps(discord_payload(form_data)).encode("utf-8")
+    
+    logger.info(f"Dispatching Discord webhook: form_id={form_id}, payload_size={len(payload_bytes)}")
     
     try:
-        response = requests.post(
+        response = post_webhook(
             webhook_url,
-            json=payload,
-            timeout=WEBHOOK_TIMEOUT,
+            data=payload_bytes,
             headers={"Content-Type": "application/json"}
         )
         
@@ -192,12 +1118,13 @@ def dispatch_discord_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dic
                 "type": "discord"
             }
     
-    except requests.Timeout:
+    except requests.Timeout as e:
         url_host = sanitize_url_for_logging(webhook_url)
-        logger.warning(f"Discord dispatch timeout: url_host={url_host}, timeout={WEBHOOK_TIMEOUT}s")
+        timeout_secs = getattr(e, "timeout_secs", WEBHOOK_TIMEOUT)
+        logger.warning(f"Discord dispatch timeout: url_host={url_host}, timeout={timeout_secs}s")
         return {
             "success": False,
-            "error": f"Timeout after {WEBHOOK_TIMEOUT}s",
+            "error": f"Timeout after {timeout_secs}s",
             "type": "discord"
         }
     
@@ -211,7 +1138,27 @@ def dispatch_discord_webhook(webhook_url: str, form_data: Dict[str, Any]) -> Dic
         }
 
 
-def dispatch_generic_webhook(webhook_url: str, webhook_config: Dict[str, Any], form_data: Dict[str, Any]) -> Dict[str, Any]:
+def generic_payload(form_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Submission fields sent to generic webhooks."""
+    return {
+        "form_id": form_data.get("form_id", "unknown"),
+        "id": form_data.get("id"),
+        "ts": form_data.get("ts"),
+        "name": form_data.get("name"),
+        "email": form_data.get("email"),
+        "message": form_data.get("message"),
+        "page": form_data.get("page"),
+        "ip": form_data.get("ip"),
+        "ua": form_data.get("ua")
+    }
+
+
+def dispatch_generic_webhook(
+    webhook_url: str,
+    webhook_config: Dict[str, Any],
+    form_data: Dict[str, Any],
+    payload_bytes: Optional[bytes] = None
+) -> Dict[str, Any]:
     """
     Dispatch to generic webhook.
     
@@ -221,49 +1168,84 @@ def dispatch_generic_webhook(webhook_url: str, webhook_config: Dict[str, Any], f
         webhook_url: Endpoint URL
         webhook_config: Webhook config from form_data["webhooks"]
         form_data: Full form submission data
+        payload_bytes: Already-serialized payload (RecordPayloads.generic()), built here if not given
     
     Returns:
         Result dict
     """
-    form_id = form_data.get("form_id", "unknown")
-    
-    # Prepare JSON payload
-    payload_dict = {
-        "form_id": form_id,
-        "id": form_data.get("id"),
-        "ts": form_data.get("ts"),
-        "name": form_data.get("name"),
-        "email": form_data.get("email"),
-        "message": form_data.get("message"),
-        "page": form_data.get("page"),
-        "ip": form_data.get("ip"),
-        "ua": form_data.get("ua")
-    }
-    
     # Serialize to JSON bytes
-    json_bytes = json.dumps(payload_dict).encode('utf-8')
+    json_bytes = payload_bytes if payload_bytes is not None else json.dumps(generic_payload(form_data)).encode('utf-8')
+    key = idempotency_key(form_data, webhook_config)
+    return post_generic_webhook(
+        webhook_url, webhook_config, json_bytes, form_data.get("form_id", "unknown"),
+        {"Idempotency-Key": key} if key else None
+    )
+
+
+def dispatch_generic_batch(
+    webhook_url: str,
+    webhook_config: Dict[str, Any],
+    encoded_payloads: List[bytes],
+    form_id: str,
+    batch_idempotency_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Dispatch several submissions to a generic webhook as one JSON array.
     
+    The array is signed as a whole (same HMAC header as single deliveries)
+    and the request carries X-FormBridge-Batch-Size (and Idempotency-Key,
+    derived from the submissions it holds, if given). The one result
+    applies to every submission in the array.
+    """
+    json_bytes = b"[" + b",".join(encoded_payloads) + b"]"
+    headers = {"X-FormBridge-Batch-Size": str(len(encoded_payloads))}
+    if batch_idempotency_key:
+        headers["Idempotency-Key"] = batch_idempotency_key
+    result = post_generic_webhook(webhook_url, webhook_config, json_bytes, form_id, headers)
+    result["batch_size"] = len(encoded_payloads)
+    return result
+
+
+def post_generic_webhook(
+    webhook_url: str,
+    webhook_config: Dict[str, Any],
+    json_bytes: bytes,
+    form_id: str,
+    extra_headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    POST a serialized generic payload (single or batch), signing it if configured.
+    
+    With "gzip": true on the webhook, bodies of at least WEBHOOK_GZIP_MIN_BYTES
+    are sent with Content-Encoding: gzip; the signature then covers the
+    compressed bytes, i.e. exactly what goes over the wire.
+    """
     headers = {
-        "Content-Type": "application/json"
+        "Content-Type": "application/json",
+        **(extra_headers or {})
     }
     
+    body = json_bytes
+    if webhook_config.get("gzip") and len(json_bytes) >= WEBHOOK_GZIP_MIN_BYTES:
+        body = gzip_payload(json_bytes)
+        headers["Content-Encoding"] = "gzip"
+    
     # Add HMAC header if secret provided
     if webhook_config.get("hmac_secret"):
         hmac_secret = webhook_config.get("hmac_secret", "")
         hmac_header = webhook_config.get("hmac_header", "X-Webhook-Signature")
         
-        signature = compute_hmac_signature(hmac_secret, json_bytes)
+        signature = compute_hmac_signature(hmac_secret, body)
         headers[hmac_header] = signature
         
         logger.info(f"Generic webhook HMAC enabled: header={hmac_header}")
     
-    logger.info(f"Dispatching generic webhook: form_id={form_id}, payload_size={len(json_bytes)}")
+    logger.info(f"Dispatching generic webhook: form_id={form_id}, payload_size={len(json_bytes)}, wire_size={len(body)}")
     
     try:
-        response = requests.post(
+        response = post_webhook(
             webhook_url,
-            data=json_bytes,
-            timeout=WEBHOOK_TIMEOUT,
+            data=body,
             headers=headers
         )
         
@@ -285,12 +1267,13 @@ def dispatch_generic_webhook(webhook_url: str, webhook_config: Dict[str, Any], f
                 "type": "generic"
             }
     
-    except requests.Timeout:
+    except requests.Timeout as e:
         url_host = sanitize_url_for_logging(webhook_url)
-        logger.warning(f"Generic dispatch timeout: url_host={url_host}, timeout={WEBHOOK_TIMEOUT}s")
+        timeout_secs = getattr(e, "timeout_secs", WEBHOOK_TIMEOUT)
+        logger.warning(f"Generic dispatch timeout: url_host={url_host}, timeout={timeout_secs}s")
         return {
             "success": False,
-            "error": f"Timeout after {WEBHOOK_TIMEOUT}s",
+            "error": f"Timeout after {timeout_secs}s",
             "type": "generic"
         }
     
@@ -304,16 +1287,522 @@ def dispatch_generic_webhook(webhook_url: str, webhook_config: Dict[str, Any], f
         }
 
 
-def process_webhook_record(record: Dict[str, Any]) -> Dict[str, Any]:
+def batch_limits(webhook_config: Dict[str, Any]) -> Optional[Tuple[int, int]]:
     """
-    Process a single SQS webhook message.
+    (max_items, max_bytes) if a generic webhook opted into batching, else None.
     
-    Extracts form_data and webhooks, dispatches to each endpoint.
-    Returns result summary.
+    "batch": true uses WEBHOOK_BATCH_MAX_ITEMS / WEBHOOK_BATCH_MAX_BYTES;
+    "batch": {"max_items": 50, "max_bytes": 65536} overrides either.
+    """
+    option = webhook_config.get("batch")
+    if not option or webhook_config.get("type", "generic") != "generic":
+        return None
+    max_items, max_bytes = WEBHOOK_BATCH_MAX_ITEMS, WEBHOOK_BATCH_MAX_BYTES
+    if isinstance(option, dict):
+        try:
+            max_items = int(option.get("max_items", max_items))
+            max_bytes = int(option.get("max_bytes", max_bytes))
+        except (TypeError, ValueError):
+            pass
+    return max(1, max_items), max(1, max_bytes)
+
+
+def chunk_payloads(encoded_payloads: List[bytes], max_items: int, max_bytes: int) -> List[List[int]]:
+    """
+    Split payloads (by index) into JSON-array chunks within the caps.
+    
+    A payload larger than max_bytes on its own still goes out, alone.
+    """
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    current_bytes = 2  # "[" and "]"
+    for index, payload in enumerate(encoded_payloads):
+        size = len(payload) + (1 if current else 0)  # comma separator
+        if current and (len(current) >= max_items or current_bytes + size > max_bytes):
+            chunks.append(current)
+            current, current_bytes = [], 2
+            size = len(payload)
+        current.append(index)
+        current_bytes += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def endpoint_key(webhook_config: Dict[str, Any]) -> str:
+    """Stable, secret-free identifier for one configured endpoint (type + URL hash)."""
+    identity = f"{webhook_config.get('type', 'generic')}|{webhook_config.get('url', '')}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+
+def get_delivery_table():
+    """DynamoDB table holding delivery state (None if not configured)."""
+    global _delivery_table
+    if not WEBHOOK_DELIVERY_TABLE:
+        return None
+    if _delivery_table is None:
+        _delivery_table = boto3.resource("dynamodb").Table(WEBHOOK_DELIVERY_TABLE)
+    return _delivery_table
+
+
+def delivery_pk(record: Dict[str, Any], body: Dict[str, Any]) -> str:
+    """Partition key for a message's delivery state (submission id, else SQS message id)."""
+    return f"DELIVERY#{body.get('id') or record.get('messageId', 'unknown')}"
+
+
+def load_delivered_endpoints(pk: str) -> set:
+    """
+    Endpoint keys that already acknowledged this delivery.
+    
+    Errors are logged and treated as "nothing delivered yet", which can only
+    cause a duplicate delivery, never a lost one.
+    """
+    table = get_delivery_table()
+    if table is None:
+        return set()
+    
+    delivered = set()
+    query_params = {
+        "KeyConditionExpression": "pk = :pk AND begins_with(sk, :sk_prefix)",
+        "ExpressionAttributeValues": {":pk": pk, ":sk_prefix": "ENDPOINT#"},
+        "ProjectionExpression": "sk, delivery_status",
+    }
+    try:
+        while True:
+            response = table.query(**query_params)
+            for item in response.get("Items", []):
+                if item.get("delivery_status") == "pending":
+                    continue  # Claimed by an in-flight delivery, not acknowledged yet
+                delivered.add(item["sk"][len("ENDPOINT#"):])
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if not last_evaluated_key:
+                break
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+    except ClientError as e:
+        logger.warning(f"Failed to load delivery state for {pk}: {e.response.get('Error', {}).get('Code', 'Unknown')}")
+        return set()
+    except Exception as e:
+        logger.warning(f"Failed to load delivery state for {pk}: {str(e)}")
+        return set()
+    
+    return delivered
+
+
+def record_delivered_endpoints(deliveries: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+    """
+    Mark endpoints as delivered: [(pk, endpoint_key, result), ...].
+    
+    Only called for messages that are going back to the queue, so the happy
+    path costs no writes. Items expire after WEBHOOK_DELIVERY_TTL_DAYS.
+    """
+    table = get_delivery_table()
+    if table is None or not deliveries:
+        return
+    
+    now = int(time.time())
+    try:
+        with table.batch_writer(overwrite_by_pkeys=["pk", "sk"]) as batch:
+            for pk, key, result in deliveries:
+                batch.put_item(Item={
+                    "pk": pk,
+                    "sk": f"ENDPOINT#{key}",
+                    "status_code": result.get("status_code", 0),
+                    "type": result.get("type", "generic"),
+                    "delivered_at": datetime.utcnow().isoformat() + "Z",
+                    "ttl": now + (WEBHOOK_DELIVERY_TTL_DAYS * 86400),
+                })
+        logger.info(f"Recorded delivery state for {len(deliveries)} endpoint(s)")
+    except Exception as e:
+        logger.warning(f"Failed to record delivery state: {str(e)}")
+
+
+class TimeBucketedSet:
+    """
+    Keys remembered for about ttl_secs, in fixed-width time buckets.
+    
+    New keys go into the current bucket; whole buckets expire at once, so
+    expiry is O(1) per bucket instead of per key. When more than
+    max_entries keys are held, the oldest keys are dropped first.
+    """
+    
+    BUCKETS = 15
+    
+    def __init__(self, ttl_secs: int, max_entries: int):
+        self.bucket_secs = max(1.0, ttl_secs / self.BUCKETS)
+        self.max_entries = max(1, max_entries)
+        self._buckets: deque = deque()  # (bucket_start, OrderedDict of keys)
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def _expire(self, now: float) -> None:
+        horizon = now - self.bucket_secs * self.BUCKETS
+        while self._buckets and self._buckets[0][0] < horizon:
+            self._size -= len(self._buckets.popleft()[1])
+        while self._size > self.max_entries and self._buckets:
+            oldest = self._buckets[0][1]
+            oldest.popitem(last=False)
+            self._size -= 1
+            if not oldest:
+                self._buckets.popleft()
+    
+    def _find(self, key: Any) -> Optional[OrderedDict]:
+        for _, keys in self._buckets:
+            if key in keys:
+                return keys
+        return None
+    
+    def add(self, key: Any) -> bool:
+        """Remember key; False if it was already there."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self._find(key) is not None:
+                return False
+            bucket_start = now - (now % self.bucket_secs)
+            if not self._buckets or self._buckets[-1][0] != bucket_start:
+                self._buckets.append((bucket_start, OrderedDict()))
+            self._buckets[-1][1][key] = None
+            self._size += 1
+            self._expire(now)
+            return True
+    
+    def discard(self, key: Any) -> None:
+        with self._lock:
+            keys = self._find(key)
+            if keys is not None:
+                del keys[key]
+                self._size -= 1
+    
+    def __len__(self) -> int:
+        return self._size
+
+
+class IdempotencyStore:
+    """
+    Claims (submission, endpoint) deliveries so each is sent at most once.
+    
+    claim() first checks the in-process TimeBucketedSet (free, catches
+    duplicates within a warm container), then, in "table" mode, writes a
+    pending marker (pk=DELIVERY#<submission-id>, sk=ENDPOINT#<key>) that only
+    succeeds if no marker exists or a previous claim's lease has run out.
+    Only a delivered marker makes a delivery a duplicate; a live pending
+    one is IN_FLIGHT, and the caller defers it back to the queue rather
+    than dropping it (the claimer may still crash).
+    complete() turns a successful claim into a delivered marker (TTL
+    WEBHOOK_DELIVERY_TTL_DAYS) and releases a failed one so a retry can
+    claim it again. DynamoDB errors fail open: a duplicate is possible, a
+    lost delivery is not.
+    """
+    
+    CLAIMED = "claimed"
+    DUPLICATE = "duplicate"
+    IN_FLIGHT = "in_flight"
+    
+    def __init__(self, mode: str = WEBHOOK_IDEMPOTENCY):
+        self.mode = mode
+        self.local = TimeBucketedSet(WEBHOOK_DEDUP_LOCAL_SECS, WEBHOOK_DEDUP_LOCAL_MAX)
+        self.lease_secs = WEBHOOK_IDEMPOTENCY_LEASE_SECS
+        self.duplicates = 0
+    
+    def set_lease_from_context(self, context: Any) -> None:
+        """Lease claims for the invocation's remaining time plus a margin."""
+        remaining_ms = getattr(context, "get_remaining_time_in_millis", None)
+        if callable(remaining_ms):
+            self.lease_secs = math.ceil(remaining_ms() / 1000) + WEBHOOK_IDEMPOTENCY_LEASE_MARGIN_SECS
+    
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("local", "table")
+    
+    def uses_table(self) -> bool:
+        return self.mode == "table" and get_delivery_table() is not None
+    
+    def claim(self, pk: str, key: str) -> str:
+        """CLAIMED if the caller should deliver, else DUPLICATE or IN_FLIGHT."""
+        if not self.enabled:
+            return self.CLAIMED
+        if not self.local.add((pk, key)):
+            # Claimed in this container: delivered, or in flight for a
+            # message in this batch that is retried if the delivery fails
+            self.duplicates += 1
+            return self.DUPLICATE
+        if not self.uses_table():
+            return self.CLAIMED
+        
+        now = int(time.time())
+        try:
+            get_delivery_table().put_item(
+                Item={
+                    "pk": pk,
+                    "sk": f"ENDPOINT#{key}",
+                    "delivery_status": "pending",
+                    "lease_until": now + self.lease_secs,
+                    "ttl": now + (WEBHOOK_DELIVERY_TTL_DAYS * 86400),
+                },
+                ConditionExpression="attribute_not_exists(sk) OR (delivery_status = :pending AND lease_until < :now)",
+                ExpressionAttributeValues={":pending": "pending", ":now": now},
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                self.local.discard((pk, key))
+                status = self._existing_status(pk, key, e.response.get("Item"))
+                if status == "pending":
+                    # Another invocation holds a live claim and may still fail or crash
+                    return self.IN_FLIGHT
+                self.duplicates += 1
+                return self.DUPLICATE
+            logger.warning(f"Failed to claim delivery {pk}/{key}: {e.response.get('Error', {}).get('Code', 'Unknown')}")
+        except Exception as e:
+            logger.warning(f"Failed to claim delivery {pk}/{key}: {str(e)}")
+        return self.CLAIMED
+    
+    def _existing_status(self, pk: str, key: str, old_item: Optional[Dict[str, Any]]) -> str:
+        """
+        delivery_status of the marker that blocked a claim.
+        
+        Uses the item returned with the failed condition (low-level
+        {"S": ...} form) or, if absent, a consistent read. Markers from
+        record_delivered_endpoints have no status and count as delivered;
+        an unreadable marker counts as pending, so the message is retried.
+        """
+        if old_item is None:
+            try:
+                old_item = get_delivery_table().get_item(
+                    Key={"pk": pk, "sk": f"ENDPOINT#{key}"},
+                    ConsistentRead=True,
+                    ProjectionExpression="delivery_status",
+                ).get("Item")
+            except Exception as e:
+                logger.warning(f"Failed to read delivery claim {pk}/{key}: {str(e)}")
+                return "pending"
+            if old_item is None:
+                return "pending"  # Released in between; the retry can claim it
+        status = old_item.get("delivery_status", "delivered")
+        return status.get("S", "delivered") if isinstance(status, dict) else status
+    
+    def complete(self, pk: str, key: str, result: Dict[str, Any]) -> None:
+        """Record the outcome of a claimed delivery."""
+        if not self.enabled:
+            return
+        if not result.get("success"):
+            self.local.discard((pk, key))
+        if not self.uses_table():
+            return
+        
+        table = get_delivery_table()
+        try:
+            if result.get("success"):
+                table.update_item(
+                    Key={"pk": pk, "sk": f"ENDPOINT#{key}"},
+                    UpdateExpression="SET delivery_status = :delivered, status_code = :status_code, delivered_at = :at REMOVE lease_until",
+                    ExpressionAttributeValues={
+                        ":delivered": "delivered",
+                        ":status_code": result.get("status_code", 0),
+                        ":at": datetime.utcnow().isoformat() + "Z",
+                    },
+                )
+            else:
+                table.delete_item(
+                    Key={"pk": pk, "sk": f"ENDPOINT#{key}"},
+                    ConditionExpression="delivery_status = :pending",
+                    ExpressionAttributeValues={":pending": "pending"},
+                )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                logger.warning(f"Failed to complete delivery claim {pk}/{key}: {e.response.get('Error', {}).get('Code', 'Unknown')}")
+        except Exception as e:
+            logger.warning(f"Failed to complete delivery claim {pk}/{key}: {str(e)}")
+
+
+_idempotency = IdempotencyStore()
+
+
+def idempotency_key(form_data: Dict[str, Any], webhook_config: Dict[str, Any]) -> Optional[str]:
+    """Idempotency-Key header value for one submission and endpoint (None without a submission id)."""
+    submission_id = form_data.get("id")
+    return f"{submission_id}:{endpoint_key(webhook_config)}" if submission_id else None
+
+
+# Retryable (not success), so the message goes back to the queue
+IN_FLIGHT_RESULT = {"success": False, "deferred": True, "in_flight": True, "error": "Delivery in flight"}
+
+
+def idempotent_call(pk: str, key: str, call: Callable[[], Dict[str, Any]], store: Optional[IdempotencyStore] = None) -> Dict[str, Any]:
+    """
+    Run a dispatch call at most once per (pk, endpoint key).
+    
+    If the call raises, the claim is released before the exception
+    propagates (the engine reports it as a retryable failure), so the
+    redelivery can claim it again.
+    """
+    store = store or _idempotency
+    claim = store.claim(pk, key)
+    if claim == IdempotencyStore.DUPLICATE:
+        logger.info(f"Duplicate delivery skipped: {pk}, endpoint={key}")
+        return {"success": True, "skipped": True, "duplicate": True}
+    if claim == IdempotencyStore.IN_FLIGHT:
+        logger.info(f"Delivery in flight elsewhere, deferring: {pk}, endpoint={key}")
+        return dict(IN_FLIGHT_RESULT)
+    
+    try:
+        result = call()
+    except Exception:
+        store.complete(pk, key, {"success": False})
+        raise
+    store.complete(pk, key, result)
+    return result
+
+
+def is_retryable_failure(result: Dict[str, Any]) -> bool:
+    """
+    True if a failed delivery is worth retrying via SQS redelivery.
+    
+    Missing URLs and 4xx responses (other than 408/429) won't succeed on a
+    retry, so they don't send the message back to the queue.
+    """
+    if result.get("success"):
+        return False
+    if result.get("error") == "Missing URL":
+        return False
+    status_code = result.get("status_code")
+    if status_code and 400 <= status_code < 500 and status_code not in (408, 429):
+        return False
+    return True
+
+
+def get_config_table():
+    global _config_table
+    if _config_table is None:
+        _config_table = boto3.resource("dynamodb").Table(FORM_CONFIG_TABLE)
+    return _config_table
+
+
+def get_form_webhooks(form_id: str, min_version: int = 0) -> List[Dict[str, Any]]:
+    """
+    Webhooks configured for a form (pk=FORM#<form_id>, sk=CONFIG#v1).
+    
+    Served from an LRU cache for WEBHOOK_CONFIG_CACHE_TTL seconds. A message
+    enqueued from a newer config version than the cached one forces a
+    re-read, so endpoints added by a config update aren't missed. Read
+    errors propagate (the message is retried) and are not cached.
+    """
+    now = time.time()
+    with _webhook_config_lock:
+        cached = _webhook_config_cache.get(form_id)
+        if cached is not None:
+            webhooks, version, expires_at = cached
+            if now < expires_at and version >= min_version:
+                _webhook_config_cache.move_to_end(form_id)
+                return webhooks
+    
+    item = get_config_table().get_item(Key={"pk": f"FORM#{form_id}", "sk": "CONFIG#v1"}).get("Item") or {}
+    webhooks = item.get("webhooks") if isinstance(item.get("webhooks"), list) else []
+    version = int(item.get("version", 0))
+    if version < min_version:
+        logger.warning(f"Form config for {form_id} is version {version}, message expects {min_version}")
+    
+    with _webhook_config_lock:
+        _webhook_config_cache[form_id] = (webhooks, version, now + WEBHOOK_CONFIG_CACHE_TTL)
+        _webhook_config_cache.move_to_end(form_id)
+        while len(_webhook_config_cache) > WEBHOOK_CONFIG_CACHE_SIZE:
+            _webhook_config_cache.popitem(last=False)
+    
+    return webhooks
+
+
+def resolve_message_body(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a reference message into the inline shape the dispatchers use.
+    
+    Inline (legacy) messages already carry their webhooks and pass through
+    unchanged.
+    """
+    if "submission" not in body:
+        return body
+    
+    form_id = body.get("form_id", "unknown")
+    resolved = {
+        "form_id": form_id,
+        **body["submission"],
+        "webhooks": get_form_webhooks(form_id, int(body.get("config_version") or 0)),
+    }
+    if body.get("only_endpoints"):
+        resolved["only_endpoints"] = body["only_endpoints"]
+    return resolved
+
+
+class RecordPayloads:
+    """
+    Serialized webhook bodies for one submission, built on first use.
+    
+    Every endpoint of a record (and every batched generic delivery of it)
+    shares the same bytes, so each body shape is built and serialized once
+    per record rather than once per endpoint.
+    """
+    
+    BUILDERS = {
+        "slack": slack_payload,
+        "discord": discord_payload,
+        "generic": generic_payload,
+    }
+    
+    def __init__(self, form_data: Dict[str, Any]):
+        self.form_data = form_data
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, webhook_type: str) -> bytes:
+        with self._lock:
+            body = self._bodies.get(webhook_type)
+            if body is None:
+                builder = self.BUILDERS.get(webhook_type, generic_payload)
+                body = json.dumps(builder(self.form_data)).encode("utf-8")
+                self._bodies[webhook_type] = body
+            return body
+    
+    def slack(self) -> bytes:
+        return self.get("slack")
+    
+    def discord(self) -> bytes:
+        return self.get("discord")
+    
+    def generic(self) -> bytes:
+        return self.get("generic")
+
+
+def dispatch_webhook(
+    webhook_config: Dict[str, Any],
+    form_data: Dict[str, Any],
+    payloads: Optional[RecordPayloads] = None
+) -> Dict[str, Any]:
+    """Dispatch one webhook based on its type (slack, discord, or generic)."""
+    webhook_type = webhook_config.get("type", "generic")
+    webhook_url = webhook_config.get("url", "")
+    payloads = payloads or RecordPayloads(form_data)
+    
+    if webhook_type == "slack":
+        return dispatch_slack_webhook(webhook_url, form_data, payloads.slack())
+    elif webhook_type == "discord":
+        return dispatch_discord_webhook(webhook_url, form_data, payloads.discord())
+    else:  # generic
+        return dispatch_generic_webhook(webhook_url, webhook_config, form_data, payloads.generic())
+
+
+def plan_webhook_record(record: Dict[str, Any]):
+    """
+    Parse a single SQS webhook message into dispatch jobs.
+    
+    Returns:
+        (body, payloads, jobs, result): payloads is the record's
+        RecordPayloads, shared by all its jobs; jobs is a list of
+        (index, host, callable, endpoint_key); result is a finished record
+        result when there is nothing to dispatch (bad JSON or no webhooks),
+        otherwise None.
     """
     try:
         # Parse SQS body
-        body = json.loads(record["body"])
+        body = resolve_message_body(json.loads(record["body"]))
         form_id = body.get("form_id", "unknown")
         webhooks = body.get("webhooks", [])
         
@@ -321,88 +1810,284 @@ def process_webhook_record(record: Dict[str, Any]) -> Dict[str, Any]:
         
         if not webhooks:
             logger.info(f"No webhooks configured for form_id={form_id}")
-            return {
+            return body, None, [], {
                 "record_id": record["messageId"],
                 "form_id": form_id,
                 "success": True,
                 "webhooks_dispatched": 0
             }
         
-        # Dispatch to each webhook
-        results = []
-        
+        payloads = RecordPayloads(body)
+        jobs = []
         for idx, webhook_config in enumerate(webhooks):
-            webhook_type = webhook_config.get("type", "generic")
             webhook_url = webhook_config.get("url", "")
-            
             if not webhook_url:
-                logger.warning(f"Missing webhook URL for form_id={form_id}, index={idx}")
-                results.append({
-                    "success": False,
-                    "error": "Missing URL",
-                    "type": webhook_type,
-                    "index": idx
-                })
+                jobs.append((idx, None, None, None))
                 continue
-            
-            # Dispatch based on type
-            if webhook_type == "slack":
-                result = dispatch_slack_webhook(webhook_url, body)
-            elif webhook_type == "discord":
-                result = dispatch_discord_webhook(webhook_url, body)
-            else:  # generic
-                result = dispatch_generic_webhook(webhook_url, webhook_config, body)
-            
-            result["index"] = idx
-            results.append(result)
-        
-        # Summary
-        success_count = sum(1 for r in results if r.get("success"))
-        
-        logger.info(
-            f"Webhook batch complete: "
-            f"form_id={form_id}, "
-            f"total={len(results)}, "
-            f"success={success_count}, "
-            f"failed={len(results) - success_count}"
-        )
+            jobs.append((
+                idx,
+                endpoint_host(webhook_url),
+                lambda webhook_config=webhook_config: dispatch_webhook(webhook_config, body, payloads),
+                endpoint_key(webhook_config)
+            ))
         
-        return {
-            "record_id": record["messageId"],
-            "form_id": form_id,
-            "success": success_count == len(results),
-            "webhooks_dispatched": len(results),
-            "results": results
-        }
+        return body, payloads, jobs, None
     
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse SQS message: {str(e)}")
-        return {
+        return None, None, [], {
             "record_id": record.get("messageId", "unknown"),
             "success": False,
+            "retry": True,  # Lands in the DLQ after maxReceiveCount for inspection
             "error": f"JSON decode error: {str(e)}"
         }
     
     except Exception as e:
         logger.error(f"Exception processing webhook record: {str(e)}")
-        return {
+        return None, None, [], {
             "record_id": record.get("messageId", "unknown"),
             "success": False,
+            "retry": True,
             "error": str(e)
         }
 
 
+def summarize_webhook_record(record: Dict[str, Any], body: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the per-record result from its per-webhook results (in webhook order)."""
+    form_id = body.get("form_id", "unknown")
+    success_count = sum(1 for r in results if r.get("success"))
+    skipped_count = sum(1 for r in results if r.get("skipped"))
+    duplicate_count = sum(1 for r in results if r.get("duplicate"))
+    deferred_count = sum(1 for r in results if r.get("deferred"))
+    retry = any(is_retryable_failure(r) for r in results)
+    
+    logger.info(
+        f"Webhook batch complete: "
+        f"form_id={form_id}, "
+        f"total={len(results)}, "
+        f"success={success_count}, "
+        f"already_delivered={skipped_count}, "
+        f"duplicates={duplicate_count}, "
+        f"deferred={deferred_count}, "
+        f"failed={len(results) - success_count}, "
+        f"retry={retry}"
+    )
+    
+    return {
+        "record_id": record["messageId"],
+        "form_id": form_id,
+        "success": success_count == len(results),
+        "retry": retry,
+        "webhooks_dispatched": len(results) - skipped_count,
+        "results": results
+    }
+
+
+def idempotent_batch_call(
+    webhook_url: str,
+    webhook_config: Dict[str, Any],
+    host: str,
+    form_id: str,
+    key: str,
+    chunk_members: List[Tuple[str, bytes]]
+) -> Dict[str, Any]:
+    """
+    Send one micro-batch chunk, claiming each submission in it first.
+    
+    chunk_members is [(delivery pk, encoded payload), ...]. Submissions that
+    are already delivered, or in flight in another invocation, are left out
+    of the array and listed in the result's "duplicates" / "in_flight_pks";
+    if none are left nothing is sent.
+    """
+    claims = [(pk, payload, _idempotency.claim(pk, key)) for pk, payload in chunk_members]
+    claimed = [(pk, payload) for pk, payload, claim in claims if claim == IdempotencyStore.CLAIMED]
+    duplicates = [pk for pk, _, claim in claims if claim == IdempotencyStore.DUPLICATE]
+    in_flight_pks = [pk for pk, _, claim in claims if claim == IdempotencyStore.IN_FLIGHT]
+    if not claimed:
+        return {"success": True, "skipped": True, "duplicate": True, "duplicates": duplicates, "in_flight_pks": in_flight_pks}
+    
+    batch_key = hashlib.sha256(
+        "|".join(sorted(pk for pk, _ in claimed)).encode("utf-8") + key.encode("utf-8")
+    ).hexdigest()[:32]
+    call = lambda: dispatch_generic_batch(webhook_url, webhook_config, [payload for _, payload in claimed], form_id, batch_key)
+    try:
+        result = throttled_call(webhook_config, host, lambda: guarded_call(host, call))
+    except Exception:
+        for pk, _ in claimed:
+            _idempotency.complete(pk, key, {"success": False})
+        raise
+    for pk, _ in claimed:
+        _idempotency.complete(pk, key, result)
+    return {**result, "duplicates": duplicates, "in_flight_pks": in_flight_pks}
+
+
+def process_webhook_records(records: List[Dict[str, Any]], engine: Optional[DispatchEngine] = None) -> List[Dict[str, Any]]:
+    """
+    Process SQS webhook messages, dispatching all their webhooks concurrently.
+    
+    Every webhook of every record goes through one DispatchEngine run, so a
+    slow endpoint only delays the calls to its own host. Results are
+    returned in record order, each with its webhook results in config order.
+    
+    On redelivery (ApproximateReceiveCount > 1) endpoints recorded as
+    delivered are skipped; when a record is going back to the queue, the
+    endpoints that succeeded this time are recorded. Calls to hosts whose
+    circuit is open are deferred without being attempted.
+    
+    Generic webhooks with "batch" set are grouped per form and endpoint
+    across the whole SQS batch and sent as JSON-array POSTs; each
+    submission in a chunk gets that chunk's result.
+    
+    Every delivery is claimed through the IdempotencyStore first, so a
+    submission that was already delivered to an endpoint (a redelivered
+    or duplicate message) is skipped instead of POSTed again.
+    """
+    engine = engine or _engine
+    planned = []
+    engine_jobs = []
+    batch_groups: "OrderedDict[Tuple, List[Tuple[List[Any], Dict[str, Any], RecordPayloads, str]]]" = OrderedDict()
+    
+    for record in records:
+        body, payloads, jobs, result = plan_webhook_record(record)
+        only_endpoints = set(body.get("only_endpoints") or []) if body else set()
+        pk = delivery_pk(record, body) if body else None
+        
+        # Table-backed claims already cover redeliveries
+        delivered = set()
+        if jobs and get_delivery_table() is not None and not _idempotency.uses_table():
+            receive_count = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+            if receive_count > 1:
+                delivered = load_delivered_endpoints(pk)
+        
+        slots = []
+        for idx, host, call, key in jobs:
+            if only_endpoints and key not in only_endpoints:
+                continue  # Rescheduled copy: another message owns this endpoint
+            if call is None:
+                logger.warning(f"Missing webhook URL for form_id={body.get('form_id', 'unknown')}, index={idx}")
+                slots.append((idx, None, key))
+            elif key in delivered:
+                slots.append((idx, "delivered", key))
+            elif batch_limits(body["webhooks"][idx]):
+                # Job index is filled in once the group is chunked
+                slot = [idx, None, key]
+                webhook_config = body["webhooks"][idx]
+                group = (
+                    body.get("form_id", "unknown"), key,
+                    webhook_config.get("hmac_secret"), webhook_config.get("hmac_header")
+                )
+                members = batch_groups.setdefault(group, [])
+                if any(member_pk == pk for _, _, _, member_pk in members):
+                    slot[1] = "duplicate"  # Same submission enqueued twice in this batch
+                else:
+                    members.append((slot, body, payloads, pk))
+                slots.append(slot)
+            else:
+                slots.append((idx, len(engine_jobs), key))
+                webhook_config = body["webhooks"][idx]
+                engine_jobs.append((
+                    host,
+                    lambda webhook_config=webhook_config, host=host, call=call, pk=pk, key=key: idempotent_call(
+                        pk, key, lambda: throttled_call(webhook_config, host, lambda: guarded_call(host, call))
+                    )
+                ))
+        planned.append((record, body, slots, result))
+    
+    for members in batch_groups.values():
+        first_slot, first_body, _, _ = members[0]
+        form_id = first_body.get("form_id", "unknown")
+        webhook_config = first_body["webhooks"][first_slot[0]]
+        webhook_url = webhook_config.get("url", "")
+        host = endpoint_host(webhook_url)
+        key = first_slot[2]
+        encoded = [member_payloads.generic() for _, _, member_payloads, _ in members]
+        chunks = chunk_payloads(encoded, *batch_limits(webhook_config))
+        
+        for chunk in chunks:
+            for position in chunk:
+                members[position][0][1] = len(engine_jobs)
+            engine_jobs.append((
+                host,
+                lambda webhook_url=webhook_url, webhook_config=webhook_config, host=host, form_id=form_id, key=key, chunk_members=[
+                    (members[position][3], encoded[position]) for position in chunk
+                ]: idempotent_batch_call(webhook_url, webhook_config, host, form_id, key, chunk_members)
+            ))
+        logger.info(f"Batched generic webhook: form_id={form_id}, url_host={host}, submissions={len(members)}, requests={len(chunks)}")
+    
+    _breaker.sync_shared([host for host, _ in engine_jobs])
+    engine_results = engine.run(engine_jobs)
+    
+    record_results = []
+    deliveries = []
+    for record, body, slots, result in planned:
+        if result is not None:
+            record_results.append(result)
+            continue
+        pk = delivery_pk(record, body)
+        
+        results = []
+        for idx, job_index, key in slots:
+            webhook_type = body["webhooks"][idx].get("type", "generic")
+            if job_index is None:
+                results.append({"success": False, "error": "Missing URL", "type": webhook_type, "index": idx})
+            elif job_index == "delivered":
+                results.append({"success": True, "skipped": True, "type": webhook_type, "index": idx})
+            elif job_index == "duplicate" or pk in engine_results[job_index].get("duplicates", ()):
+                results.append({"success": True, "skipped": True, "duplicate": True, "type": webhook_type, "index": idx})
+            elif pk in engine_results[job_index].get("in_flight_pks", ()):
+                results.append({"type": webhook_type, **IN_FLIGHT_RESULT, "index": idx})
+            else:
+                job_result = {k: v for k, v in engine_results[job_index].items() if k not in ("duplicates", "in_flight_pks")}
+                results.append({"type": webhook_type, **job_result, "index": idx})
+        
+        record_result = summarize_webhook_record(record, body, results)
+        record_results.append(record_result)
+        
+        # If rate limits are the only reason to retry, send just those
+        # endpoints again after the limit clears instead of redelivering
+        retrying = [
+            (key, r) for (idx, job_index, key), r in zip(slots, results) if is_retryable_failure(r)
+        ]
+        if retrying and all(r.get("rate_limited") for _, r in retrying):
+            delay_secs = max(r.get("retry_after", 0) for _, r in retrying)
+            if reschedule_endpoints(record, [key for key, _ in retrying], delay_secs):
+                record_result["retry"] = False
+                record_result["rescheduled"] = len(retrying)
+        
+        if record_result["retry"] and not _idempotency.uses_table():
+            for (idx, job_index, key), webhook_result in zip(slots, results):
+                if isinstance(job_index, int) and webhook_result.get("success") and not webhook_result.get("skipped"):
+                    deliveries.append((pk, key, webhook_result))
+    
+    record_delivered_endpoints(deliveries)
+    return record_results
+
+
+def process_webhook_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process a single SQS webhook message.
+    
+    Extracts form_data and webhooks, dispatches to each endpoint.
+    Returns result summary.
+    """
+    return process_webhook_records([record])[0]
+
+
 def lambda_handler(event, context):
     """
     Handle SQS webhook dispatch batch.
     
     For each SQS message:
     1. Parse form_data and webhooks array
-    2. Dispatch to each webhook URL
+    2. Dispatch to each webhook URL (concurrently across the whole batch,
+       within WEBHOOK_MAX_IN_FLIGHT and WEBHOOK_MAX_PER_HOST)
     3. Return success/failure per webhook
     
-    Message failures return to SQS queue for retry (handled by SQS redrive policy).
-    Successful messages are automatically deleted by SQS.
+    Returns batchItemFailures (requires ReportBatchItemFailures on the event
+    source mapping): only messages with a retryable failure go back to the
+    queue, after a per-message backoff (back_off_retries), and the SQS
+    redrive policy moves them to the DLQ after maxReceiveCount. Everything
+    else is deleted by SQS.
     """
     logger.info(f"Received SQS batch: {len(event.get('Records', []))} messages")
     
@@ -412,32 +2097,30 @@ def lambda_handler(event, context):
         "records": []
     }
     
-    for record in event.get("Records", []):
-        result = process_webhook_record(record)
-        batch_results["records"].append(result)
+    _idempotency.set_lease_from_context(context)
+    started = time.perf_counter()
+    batch_results["records"] = process_webhook_records(event.get("Records", []))
+    batch_results["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    _sessions.log_stats()
+    _latency.log_stats()
+    _rate_limiter.log_stats()
     
     # Log batch summary
     successful = sum(1 for r in batch_results["records"] if r.get("success"))
     failed = len(batch_results["records"]) - successful
+    failures = [{"itemIdentifier": r["record_id"]} for r in batch_results["records"] if r.get("retry")]
+    rescheduled = sum(r.get("rescheduled", 0) for r in batch_results["records"])
+    back_off_retries(event.get("Records", []), [f["itemIdentifier"] for f in failures])
     
     logger.info(
         f"SQS batch complete: "
         f"total_records={batch_results['batch_size']}, "
         f"successful={successful}, "
-        f"failed={failed}"
+        f"failed={failed}, "
+        f"retrying={len(failures)}, "
+        f"rescheduled_endpoints={rescheduled}"
     )
     
-    # If any message failed, raise exception so SQS retries
-    # (SQS handles redrive automatically)
-    if failed > 0:
-        logger.warning(f"Batch had {failed} failures, will retry via SQS redrive policy")
-        # Don't raise - SQS will retry failed messages automatically if we don't delete them
-        # We only need to raise if we want Lambda to fail the entire batch
-        # Better to return success and let SQS manage individual message retries
-    
     logger.info(f"Lambda execution complete: batch_results={json.dumps(batch_results)}")
     
-    return {
-        "statusCode": 200,
-        "body": json.dumps(batch_results)
-    }
+    return {"batchItemFailures": failures}
@@ -66,6 +66,7 @@ put_form_config() {
   local item_json="{
     \"pk\": {\"S\": \"FORM#$form_id\"},
     \"sk\": {\"S\": \"CONFIG#v1\"},
+    \"version\": {\"N\": \"$(date +%s)\"},
     \"recipients\": {\"L\": $recipients_json},
     \"brand_primary_hex\": {\"S\": \"$brand_color\"},
     \"dashboard_url\": {\"S\": \"$dashboard_url\"}"
@@ -92,6 +93,20 @@ put_form_config() {
   fi
 }
 
+# Bump the global config epoch so warm Lambda containers drop cached form configs
+bump_config_epoch() {
+  if aws dynamodb update-item \
+    --table-name "$TABLE_NAME" \
+    --key '{"pk": {"S": "CONFIG#EPOCH"}, "sk": {"S": "CONFIG#EPOCH"}}' \
+    --update-expression "ADD epoch :one" \
+    --expression-attribute-values '{":one": {"N": "1"}}' \
+    --region "$REGION" 2>/dev/null; then
+    echo -e "${GREEN}✓${NC} Bumped config epoch"
+  else
+    echo -e "${RED}✗${NC} Failed to bump config epoch (cached configs expire after FORM_CONFIG_CACHE_TTL)"
+  fi
+}
+
 # Seed form configurations
 echo -e "${BLUE}Seeding form configurations...${NC}"
 echo ""
@@ -123,6 +138,9 @@ put_form_config \
   "https://example.com/dashboard?form=support"
 echo ""
 
+bump_config_epoch
+echo ""
+
 echo -e "${GREEN}=== Seeding Complete ===${NC}"
 echo ""
 echo "Next steps:"
@@ -96,6 +96,7 @@ EOF
     --item "{
       \"pk\": {\"S\": \"FORM#$form_id\"},
       \"sk\": {\"S\": \"CONFIG#v1\"},
+      \"version\": {\"N\": \"$(date +%s)\"},
       \"recipients\": {\"L\": $recipients_list},
       \"subject_prefix\": {\"S\": \"$subject_prefix\"},
       \"brand_primary_hex\": {\"S\": \"$brand_hex\"},
@@ -110,6 +111,17 @@ EOF
   echo "  ✅ $form_id seeded"
 }
 
+# Bump the global config epoch so warm Lambda containers drop cached form configs
+bump_config_epoch() {
+  aws dynamodb update-item \
+    --region "$REGION" \
+    --table-name "$TABLE_NAME" \
+    --key '{"pk": {"S": "CONFIG#EPOCH"}, "sk": {"S": "CONFIG#EPOCH"}}' \
+    --update-expression "ADD epoch :one" \
+    --expression-attribute-values '{":one": {"N": "1"}}' \
+    2>/dev/null && echo "🔁 Config epoch bumped" || echo "  ⚠️  Failed to bump config epoch"
+}
+
 # Example configurations
 # TODO: Update these with your actual Slack URLs, Discord URLs, and webhook.site endpoints
 
@@ -149,6 +161,8 @@ put_form_config \
   "https://webhook.site/your-unique-id-for-careers" \
   "careers-webhook-secret"
 
+bump_config_epoch
+
 echo ""
 echo "═══════════════════════════════════════════════════════════════════"
 echo "✅ Webhook configuration seeding complete!"